@@ -1,7 +1,7 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import os
-import base64
+import re
 
 # -------------------------------------------------
 # Page config
@@ -76,47 +76,27 @@ elif page == "app":
 # -------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
-IMAGES_DIR = os.path.join(STATIC_DIR, "Images")
+IMAGES_DIR = os.path.join(STATIC_DIR, "images")
 
-# -------------------------------------------------
-# Helper function to encode images
-# -------------------------------------------------
-def get_base64_image(image_path):
-    """Convert image to base64 string"""
-    if os.path.exists(image_path):
-        with open(image_path, "rb") as f:
-            data = base64.b64encode(f.read()).decode()
-            # Determine the image type from extension
-            ext = os.path.splitext(image_path)[1].lower()
-            if ext == '.png':
-                return f"data:image/png;base64,{data}"
-            elif ext in ['.jpg', '.jpeg']:
-                return f"data:image/jpeg;base64,{data}"
-            elif ext == '.gif':
-                return f"data:image/gif;base64,{data}"
-            elif ext == '.webp':
-                return f"data:image/webp;base64,{data}"
-    return ""
+# Images are served by Streamlit's static file server (enableStaticServing
+# in .streamlit/config.toml) at /app/static/, so the browser fetches them
+# in parallel and caches them instead of parsing inline base64 data URIs.
+STATIC_URL_PREFIX = "/app/static/images/"
 
-# -------------------------------------------------
-# Load CSS
-# -------------------------------------------------
-css_content = ""
-css_path = os.path.join(STATIC_DIR, "styles.css")
-if os.path.exists(css_path):
-    with open(css_path, "r", encoding="utf-8") as f:
-        css_content = f.read()
+IMG_TAG_PATTERN = re.compile(r'<img\b')
+
+def _mtime(path):
+    """Modification time used to invalidate caches when a file changes."""
+    return os.path.getmtime(path) if os.path.exists(path) else 0.0
 
 # -------------------------------------------------
-# Load HTML and replace image paths
+# Build the landing page HTML (cached across reruns)
 # -------------------------------------------------
+css_path = os.path.join(STATIC_DIR, "styles.css")
 html_path = os.path.join(STATIC_DIR, "index.html")
-if os.path.exists(html_path):
-    with open(html_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
-        
-        # Inject CSS with additional fixes for image positioning
-        additional_css = """
+
+# Additional CSS fixes for image positioning, injected into index.html
+ADDITIONAL_CSS = """
         <style>
         /* Ensure images are positioned correctly */
         body {
@@ -247,41 +227,48 @@ if os.path.exists(html_path):
         </style>
         """
         
-        # Inject both CSS files
-        if css_content and "</head>" in html_content:
-            html_content = html_content.replace(
-                "</head>", 
-                f"<style>{css_content}</style>{additional_css}</head>"
-            )
-        
-        # Replace all image references with base64
-        image_mappings = {
-            "images/courthouse.png": os.path.join(IMAGES_DIR, "courthouse.png"),
-            "images/jg1.png": os.path.join(IMAGES_DIR, "jg1.png"),
-            "images/jg2.png": os.path.join(IMAGES_DIR, "jg2.png"),
-            "images/demon.png": os.path.join(IMAGES_DIR, "demon.png"),
-            "images/review.png": os.path.join(IMAGES_DIR, "review.png"),
-            "images/review2.png": os.path.join(IMAGES_DIR, "review2.png"),
-            "images/review3.png": os.path.join(IMAGES_DIR, "review3.png"),
-        }
-        
-        # Replace each image source with base64
-        for img_src, img_path in image_mappings.items():
-            base64_img = get_base64_image(img_path)
-            if base64_img:
-                html_content = html_content.replace(
-                    f'src="{img_src}"',
-                    f'src="{base64_img}"'
-                )
-                print(f"✅ Replaced {img_src}")
-            else:
-                print(f"⚠️ Image not found: {img_path}")
-        
-        # Render the HTML with full viewport height
-        components.html(
-            html_content,
-            height=2000,  # Increased height
-            scrolling=True
+@st.cache_data(show_spinner=False)
+def build_landing_html(css_mtime, html_mtime):
+    """Assemble the full landing HTML once: CSS inject + static image URLs.
+
+    st.cache_data, not lru_cache: Streamlit re-executes this page script
+    in a fresh namespace on every rerun, so a module-level lru_cache is
+    reborn empty each time — only Streamlit's own store survives reruns.
+    The mtime arguments bust the cache when the source files change.
+    """
+    css_content = ""
+    if os.path.exists(css_path):
+        with open(css_path, "r", encoding="utf-8") as f:
+            css_content = f.read()
+
+    with open(html_path, "r", encoding="utf-8") as f:
+        html_content = f.read()
+
+    # Inject both CSS files
+    if css_content and "</head>" in html_content:
+        html_content = html_content.replace(
+            "</head>",
+            f"<style>{css_content}</style>{ADDITIONAL_CSS}</head>"
         )
+
+    # Point image references at the static file server (prefix rewrite only)
+    html_content = html_content.replace('src="images/', f'src="{STATIC_URL_PREFIX}')
+
+    # Defer offscreen images so they don't block first paint
+    html_content = IMG_TAG_PATTERN.sub('<img loading="lazy" decoding="async"', html_content)
+    return html_content
+
+# -------------------------------------------------
+# Render the landing page
+# -------------------------------------------------
+if os.path.exists(html_path):
+    html_content = build_landing_html(_mtime(css_path), _mtime(html_path))
+
+    # Render the HTML with full viewport height
+    components.html(
+        html_content,
+        height=2000,  # Increased height
+        scrolling=True
+    )
 else:
     st.error("❌ index.html not found")
\ No newline at end of file
@@ -1,47 +1,77 @@
 # chat.py – Multi-index RAG (Constitution + Criminal Law)
 import os
-import re
 import json
+import hashlib
+import heapq
+import logging
 import uuid
 from datetime import datetime
-from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings
-from pinecone import Pinecone
-from openai import OpenAI
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Level-gated logging instead of bare prints: failed sub-queries on the hot
+# retrieval path no longer serialize on the stdout lock
+logger = logging.getLogger(__name__)
 
 # -------------------------------
-# 🔑 Load API Keys (works locally AND on Streamlit Cloud)
+# 🔑 API Keys & Clients (lazy init)
 # -------------------------------
 import streamlit as st
 
-# Try Streamlit secrets first (for cloud deployment), fallback to .env (for local)
-try:
-    OPENAI_KEY = st.secrets["OPENAI_API_KEY"]
-    PINE_API = st.secrets["PINECONE_API_KEY"]
-    print("✅ Loaded API keys from Streamlit secrets")
-except:
-    load_dotenv()
-    OPENAI_KEY = os.environ["OPENAI_API_KEY"]
-    PINE_API = os.environ["PINECONE_API_KEY"]
-    print("✅ Loaded API keys from .env file")
-# -------------------------------
-# 🔧 Init Clients
-# -------------------------------
-try:
-    client = OpenAI(api_key=OPENAI_KEY)
-    pc = Pinecone(api_key=PINE_API)
+# Heavy SDK imports and client construction are deferred to first use so that
+# merely importing chat.py (Streamlit page discovery, evaluation imports, the
+# landing page) doesn't pay seconds of cold-start cost.
+OPENAI_KEY = None
+PINE_API = None
+client = None
+pc = None
+indexes = None
+emb = None
 
-    # ✅ Multi-index setup
-    indexes = {
-        "constitution": pc.Index("indialaw"),
-        "criminal": pc.Index("criminallaw")
-    }
+def _lazy_init():
+    """Import SDKs and build clients on first use; no-op afterwards."""
+    global OPENAI_KEY, PINE_API, client, pc, indexes, emb
+    if client is not None:
+        return
 
-    emb = OpenAIEmbeddings(model="text-embedding-3-large", openai_api_key=OPENAI_KEY)
-    print("✅ All clients initialized successfully (multi-index mode)")
-except Exception as e:
-    print(f"❌ Error initializing clients: {e}")
-    raise
+    from langchain_openai import OpenAIEmbeddings
+    from pinecone import Pinecone
+    from openai import OpenAI
+
+    # Try Streamlit secrets first (for cloud deployment), fallback to .env (for local)
+    try:
+        OPENAI_KEY = st.secrets["OPENAI_API_KEY"]
+        PINE_API = st.secrets["PINECONE_API_KEY"]
+        logger.info("✅ Loaded API keys from Streamlit secrets")
+    except:
+        from dotenv import load_dotenv
+        load_dotenv()
+        OPENAI_KEY = os.environ["OPENAI_API_KEY"]
+        PINE_API = os.environ["PINECONE_API_KEY"]
+        logger.info("✅ Loaded API keys from .env file")
+
+    try:
+        client = OpenAI(api_key=OPENAI_KEY)
+        pc = Pinecone(api_key=PINE_API)
+
+        # ✅ Multi-index setup
+        indexes = {
+            "constitution": pc.Index("indialaw"),
+            "criminal": pc.Index("criminallaw")
+        }
+
+        # -small at 512 dims (matryoshka truncation) gives similar recall ahead of
+        # the reranker at a fraction of the latency and payload size of -large
+        emb = OpenAIEmbeddings(model="text-embedding-3-small", dimensions=512, openai_api_key=OPENAI_KEY)
+        logger.info("✅ All clients initialized successfully (multi-index mode)")
+    except Exception as e:
+        logger.error(f"❌ Error initializing clients: {e}")
+        raise
+
+# Shared across turns: Pinecone queries are network-bound and release the GIL,
+# so fanning them out collapses wall time from sum-of-latencies to max-of-latencies.
+QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=8)
 
 SYSTEM_PROMPT = """You are an Indian law assistant.
 Your job is to:
@@ -62,23 +92,55 @@ SESSIONS_DIR = "sessions"
 os.makedirs(SESSIONS_DIR, exist_ok=True)
 
 SESSION_ID = datetime.now().strftime("%Y%m%d_%H%M%S") + "_" + str(uuid.uuid4())[:8]
-SESSION_FILE = os.path.join(SESSIONS_DIR, f"{SESSION_ID}.json")
+SESSION_FILE = os.path.join(SESSIONS_DIR, f"{SESSION_ID}.jsonl")
 
 chat_history = []
 
-def save_session():
+# orjson serializes ~5× faster than stdlib json; fall back when not installed
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False)
+
+def save_session(new_messages):
+    """Append only the newly added messages (JSONL, constant cost per turn)."""
     try:
-        with open(SESSION_FILE, "w", encoding="utf-8") as f:
-            json.dump(chat_history, f, ensure_ascii=False, indent=2)
+        with open(SESSION_FILE, "a", encoding="utf-8") as f:
+            for msg in new_messages:
+                f.write(_json_dumps(msg) + "\n")
     except Exception as e:
-        print(f"⚠️ Failed to save session: {e}")
+        logger.warning(f"⚠️ Failed to save session: {e}")
+
+def load_session(path):
+    """Iterate messages from a JSONL session file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
 
 # -------------------------------
 # 🔍 Multi-Query Expansion
 # -------------------------------
+# List-marker characters stripped from LLM output lines (module scope so the
+# constant isn't rebuilt per call on the hot path)
+_STRIP_CHARS = "-•1234567890. "
+
+@lru_cache(maxsize=4096)
+def embed_query_cached(text):
+    """Memoized single-text embedding (tuple because lists aren't hashable)."""
+    _lazy_init()
+    return tuple(emb.embed_query(text))
+
+@lru_cache(maxsize=1024)
 def generate_alternative_queries(question, n=3):
     if not question.strip():
         return [question]
+    _lazy_init()
     
     prompt = f"""
     Rewrite the following law-related question into {n} different variations:
@@ -99,134 +161,283 @@ def generate_alternative_queries(question, n=3):
             timeout=30
         )
         content = resp.choices[0].message.content.strip()
-        variations = [q.strip("-•1234567890. ") for q in content.split("\n") if q.strip()]
+        variations = [q.strip(_STRIP_CHARS) for q in content.split("\n") if q.strip()]
         return list(set([question] + variations))[:n+1]
     except Exception as e:
-        print(f"⚠️ Query expansion failed: {e}")
+        logger.warning(f"⚠️ Query expansion failed: {e}")
         return [question]
 
+# Cheap keyword router: query a single index when the domain is obvious,
+# fall back to all indexes when the question is ambiguous
+CRIMINAL_TERMS = (
+    "murder", "theft", "crime", "criminal", "bail", "arrest", "ipc",
+    "punishment", "offence", "offense", "police", "fir", "rape", "fraud",
+    "dowry", "kidnap", "bribe", "forgery", "assault",
+)
+CONSTITUTION_TERMS = (
+    "constitution", "article", "fundamental right", "fundamental dut",
+    "amendment", "preamble", "schedule", "parliament", "president",
+    "supreme court", "writ", "directive principle", "secular", "citizenship",
+)
+
+MAX_RETRIEVED = 20  # merged matches passed on to cross-link expansion
+
+def route_indexes(question):
+    """Pick the indexes worth querying for this question."""
+    q = question.lower()
+    criminal = any(term in q for term in CRIMINAL_TERMS)
+    constitutional = any(term in q for term in CONSTITUTION_TERMS)
+    if criminal and not constitutional:
+        return {"criminal": indexes["criminal"]}
+    if constitutional and not criminal:
+        return {"constitution": indexes["constitution"]}
+    return indexes
+
 def multi_query_retrieve(question, k=5, verbose=False):
     """Retrieve from ALL indexes and merge results"""
     if not question.strip():
         return []
-    
-    queries = generate_alternative_queries(question, n=3)
+    _lazy_init()
+
+    # Short questions rarely benefit from expansion — skip the extra LLM call
+    if len(question.strip()) < 60:
+        queries = [question]
+    else:
+        queries = generate_alternative_queries(question, n=3)
     if verbose:
-        print(f"🔄 Expanded into {len(queries)} queries")
+        logger.info(f"🔄 Expanded into {len(queries)} queries")
+
+    # Embed all query variations in one API call instead of one per query
+    # (single queries — the common chat case — go through the LRU cache)
+    try:
+        if len(queries) == 1:
+            qvecs = [list(embed_query_cached(queries[0]))]
+        else:
+            qvecs = emb.embed_documents(queries)
+    except Exception as e:
+        logger.warning(f"⚠️ Batch embedding failed, falling back to per-query: {e}")
+        qvecs = []
+        for q in queries:
+            try:
+                qvecs.append(list(embed_query_cached(q)))
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding failed for '{q[:50]}...': {e}")
+                qvecs.append(None)
 
     expanded_matches = {}
-    successful_queries = 0
+    target_indexes = route_indexes(question)
+    if verbose and len(target_indexes) < len(indexes):
+        logger.info(f"🧭 Routed to {list(target_indexes)} index only")
+
+    # Fan out every (query, index) pair across the shared thread pool
+    tasks = []
+    for q, qvec in zip(queries, qvecs):
+        if qvec is None:
+            continue
+        for name, idx in target_indexes.items():
+            tasks.append((q, qvec, name, idx))
 
-    for q in queries:
+    def run_query(task):
+        _, qvec, name, idx = task
+        return idx.query(vector=qvec, top_k=k, include_metadata=True, include_values=True)
+
+    futures = [QUERY_EXECUTOR.submit(run_query, t) for t in tasks]
+    succeeded = set()
+    for (q, _, name, _), fut in zip(tasks, futures):
         try:
-            qvec = emb.embed_query(q)
-            for name, idx in indexes.items():
-                res = idx.query(vector=qvec, top_k=k, include_metadata=True)
-                for m in res.get("matches", []):
-                    m["metadata"]["index_source"] = name  # 👈 tag which index
-                    if m["id"] not in expanded_matches or m["score"] > expanded_matches[m["id"]]["score"]:
-                        expanded_matches[m["id"]] = m
-            successful_queries += 1
+            res = fut.result()
+            for m in res.get("matches", []):
+                m["metadata"]["index_source"] = name  # 👈 tag which index
+                if m["id"] not in expanded_matches or m["score"] > expanded_matches[m["id"]]["score"]:
+                    expanded_matches[m["id"]] = m
+            succeeded.add(q)
         except Exception as e:
-            print(f"⚠️ Query failed for '{q[:50]}...': {e}")
-            continue
-    
+            logger.warning(f"⚠️ Query failed for '{q[:50]}...': {e}")
+
     if verbose:
-        print(f"📚 Retrieved {len(expanded_matches)} unique chunks across {len(indexes)} indexes")
-    
-    return list(expanded_matches.values())
+        successful_queries = len(succeeded)
+        logger.info(f"📚 Retrieved {len(expanded_matches)} unique chunks from {successful_queries}/{len(queries)} queries across {len(target_indexes)} indexes")
+
+    # Only the top scorers survive downstream anyway — keep the fan-out bounded
+    return heapq.nlargest(MAX_RETRIEVED, expanded_matches.values(),
+                          key=lambda m: m.get("score", 0))
 
 # -------------------------------
 # 🔗 Cross-link Expansion
 # -------------------------------
+MAX_RELATED_VALUES = 5   # unique cross-link keys to follow per batch
+MAX_RERANK_CANDIDATES = 15  # cap what reaches the reranker
+
+def _dedupe_and_cap(chunks, cap=MAX_RERANK_CANDIDATES):
+    """Drop near-duplicate chunks (same text across indexes) and keep top scorers."""
+    unique = {}
+    for c in chunks:
+        text = c.get("metadata", {}).get("text", "")
+        key = hashlib.blake2b(text.encode(), digest_size=8).hexdigest() if text else c["id"]
+        if key not in unique or c.get("score", 0) > unique[key].get("score", 0):
+            unique[key] = c
+    return sorted(unique.values(), key=lambda x: x.get("score", 0), reverse=True)[:cap]
+
 def expand_with_links(chunks, k=3, verbose=False):
     if not chunks:
         return []
-    
+    _lazy_init()
+
     expanded = {c["id"]: c for c in chunks}
+
+    # Collect related keys first so they can be embedded in one batch,
+    # capped across the whole batch rather than per chunk
+    related_values = []
+    seen_values = set()
     for c in chunks:
+        if len(related_values) >= MAX_RELATED_VALUES:
+            break
         try:
             meta = c.get("metadata", {})
-            related_keys = []
             for key in ["schedule", "appendix", "part"]:
                 value = meta.get(key)
                 if value and isinstance(value, str) and len(value.strip()) > 2:
-                    related_keys.append(value)
-            for value in related_keys[:3]:
-                try:
-                    qvec = emb.embed_query(value)
-                    # search in ALL indexes
-                    for name, idx in indexes.items():
-                        followup = idx.query(vector=qvec, top_k=k, include_metadata=True)
-                        for m in followup.get("matches", []):
-                            m["metadata"]["index_source"] = name
-                            if m["id"] not in expanded:
-                                expanded[m["id"]] = m
-                except Exception as e:
-                    print(f"⚠️ Cross-link query failed for '{value}': {e}")
+                    if value not in seen_values:
+                        seen_values.add(value)
+                        related_values.append(value)
+                        if len(related_values) >= MAX_RELATED_VALUES:
+                            break
         except Exception as e:
-            print(f"⚠️ Error in cross-links: {e}")
+            logger.warning(f"⚠️ Error in cross-links: {e}")
+
+    if not related_values:
+        return _dedupe_and_cap(expanded.values())
+
+    try:
+        qvecs = emb.embed_documents(related_values)
+    except Exception as e:
+        logger.warning(f"⚠️ Batch embedding failed, falling back to per-value: {e}")
+        qvecs = []
+        for value in related_values:
+            try:
+                qvecs.append(list(embed_query_cached(value)))
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding failed for '{value}': {e}")
+                qvecs.append(None)
+
+    # Fan out every (value, index) pair across the shared thread pool
+    tasks = []
+    for value, qvec in zip(related_values, qvecs):
+        if qvec is None:
+            continue
+        for name, idx in indexes.items():
+            tasks.append((value, qvec, name, idx))
+
+    def run_query(task):
+        _, qvec, name, idx = task
+        return idx.query(vector=qvec, top_k=k, include_metadata=True, include_values=True)
+
+    futures = [QUERY_EXECUTOR.submit(run_query, t) for t in tasks]
+    for (value, _, name, _), fut in zip(tasks, futures):
+        try:
+            followup = fut.result()
+            for m in followup.get("matches", []):
+                m["metadata"]["index_source"] = name
+                if m["id"] not in expanded:
+                    expanded[m["id"]] = m
+        except Exception as e:
+            logger.warning(f"⚠️ Cross-link query failed for '{value}': {e}")
+    results = _dedupe_and_cap(expanded.values())
     if verbose:
-        print(f"🔗 Expanded to {len(expanded)} chunks with cross-links")
-    return list(expanded.values())
+        logger.info(f"🔗 Expanded to {len(results)} chunks with cross-links (from {len(expanded)})")
+    return results
 
 # -------------------------------
 # 🔎 Reranking
 # -------------------------------
+# Optional local cross-encoder (int8 ONNX): scores all (query, chunk) pairs
+# in one batched CPU inference call when the model file is available.
+RERANKER_ONNX_PATH = os.environ.get("RERANKER_ONNX_PATH", "bge-reranker-base-int8.onnx")
+reranker_session = None
+reranker_tokenizer = None
+try:
+    if os.path.exists(RERANKER_ONNX_PATH):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        reranker_session = onnxruntime.InferenceSession(
+            RERANKER_ONNX_PATH, providers=["CPUExecutionProvider"]
+        )
+        reranker_tokenizer = Tokenizer.from_pretrained("BAAI/bge-reranker-base")
+        reranker_tokenizer.enable_truncation(max_length=512)
+        reranker_tokenizer.enable_padding()
+        logger.info("✅ Local ONNX reranker loaded")
+except Exception as e:
+    logger.warning(f"⚠️ ONNX reranker unavailable, using MMR rerank: {e}")
+    reranker_session = None
+    reranker_tokenizer = None
+
+def _rerank_with_cross_encoder(question, chunks, top_k):
+    """Score (question, chunk) pairs with the local cross-encoder in one batch."""
+    pairs = [(question, c.get("metadata", {}).get("text", "")[:1000]) for c in chunks]
+    encodings = reranker_tokenizer.encode_batch(pairs)
+    logits = reranker_session.run(None, {
+        "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+        "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+    })[0]
+    order = np.argsort(logits[:, 0])[::-1][:top_k]
+    return [chunks[i] for i in order]
+
+MMR_LAMBDA = 0.7  # trade-off between relevance and diversity
+
+def _cosine(a, b):
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / denom) if denom else 0.0
+
 def rerank_chunks(question, chunks, top_k=5, verbose=False):
+    """Deterministic rerank: vector score + MMR diversity.
+
+    Uses the similarity scores and embeddings Pinecone already returned
+    (include_values=True), so no extra LLM round-trip is needed.
+    """
     if not chunks:
         return []
     if len(chunks) <= top_k:
         return chunks[:top_k]
 
-    chunk_texts = []
-    for i, c in enumerate(chunks):
-        text = c.get('metadata', {}).get('text', '')[:300]
-        source = c.get('metadata', {}).get('index_source', 'unknown')
-        chunk_texts.append(f"Chunk {i} ({source}): {text}")
-    
-    chunk_block = "\n\n".join(chunk_texts)
-
-    rerank_prompt = f"""
-    You are a legal assistant. Rank the following chunks by their relevance to the question.
+    if reranker_session is not None:
+        try:
+            return _rerank_with_cross_encoder(question, chunks, top_k)
+        except Exception as e:
+            logger.warning(f"⚠️ Cross-encoder rerank failed, falling back to MMR: {e}")
 
-    Question: {question}
+    try:
+        ranked = sorted(chunks, key=lambda x: x.get("score", 0), reverse=True)
+        vectors = []
+        for c in ranked:
+            values = c.get("values")
+            vectors.append(np.asarray(values, dtype=np.float32) if values else None)
 
-    Chunks:
-    {chunk_block}
+        # Greedy MMR selection: start from the best match, then prefer
+        # chunks that are relevant but not redundant with what's selected.
+        selected = [0]
+        candidates = list(range(1, len(ranked)))
+        while candidates and len(selected) < top_k:
+            best_i = candidates[0]
+            best_val = float("-inf")
+            for i in candidates:
+                relevance = float(ranked[i].get("score", 0.0))
+                redundancy = 0.0
+                if vectors[i] is not None:
+                    for j in selected:
+                        if vectors[j] is not None:
+                            redundancy = max(redundancy, _cosine(vectors[i], vectors[j]))
+                mmr = MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * redundancy
+                if mmr > best_val:
+                    best_val = mmr
+                    best_i = i
+            selected.append(best_i)
+            candidates.remove(best_i)
 
-    Output ONLY the top {top_k} chunk numbers in order of relevance, comma-separated.
-    """
-
-    try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": rerank_prompt}],
-            temperature=0,
-            max_tokens=100,
-            timeout=30
-        )
-        raw_output = resp.choices[0].message.content.strip()
-        numbers = re.findall(r'\b\d+\b', raw_output)
-        selected_idx = []
-        for num_str in numbers:
-            try:
-                idx = int(num_str)
-                if 0 <= idx < len(chunks) and idx not in selected_idx:
-                    selected_idx.append(idx)
-                if len(selected_idx) >= top_k:
-                    break
-            except:
-                continue
-        if len(selected_idx) < top_k:
-            for i in range(len(chunks)):
-                if i not in selected_idx:
-                    selected_idx.append(i)
-                if len(selected_idx) >= top_k:
-                    break
-        return [chunks[i] for i in selected_idx[:top_k]]
+        if verbose:
+            logger.info(f"🔎 MMR selected {len(selected)} of {len(ranked)} chunks")
+        return [ranked[i] for i in selected[:top_k]]
     except Exception as e:
-        print(f"⚠️ Reranking failed: {e}")
+        logger.warning(f"⚠️ Reranking failed: {e}")
         return sorted(chunks, key=lambda x: x.get("score", 0), reverse=True)[:top_k]
 
 # -------------------------------
@@ -256,18 +467,39 @@ def build_context(chunks, max_length=8000):
 # -------------------------------
 # 🧠 Answer
 # -------------------------------
-def answer_question(question, verbose=False):
+# Named so callers can tell these fallbacks apart from real answers —
+# empty retrieval is what a Pinecone/OpenAI outage looks like, so e.g.
+# the chat page must not cache them as if they were the answer
+NO_RESULTS_MESSAGE = "I couldn't find relevant information."
+NO_CONTEXT_MESSAGE = "I found data but couldn’t extract meaningful content."
+
+def stream_answer(question, verbose=False, chunks=None):
+    """Yield the final answer token-by-token (usable with st.write_stream).
+
+    The first tokens arrive as soon as the model starts generating instead
+    of waiting for the full completion. Callers that already ran retrieval
+    (e.g. the evaluators) can pass their reranked chunks to skip it here.
+    Pipeline failures yield an error line for display and then re-raise so
+    streaming callers can distinguish them from a completed answer.
+    """
     if not question.strip():
-        return "Please provide a valid question."
+        yield "Please provide a valid question."
+        return
     try:
-        candidate_chunks = multi_query_retrieve(question, k=5, verbose=verbose)
-        if not candidate_chunks:
-            return "I couldn't find relevant information."
-        expanded_chunks = expand_with_links(candidate_chunks, k=3, verbose=verbose)
-        top_chunks = rerank_chunks(question, expanded_chunks, top_k=5, verbose=verbose)
+        _lazy_init()
+        if chunks is not None:
+            top_chunks = chunks
+        else:
+            candidate_chunks = multi_query_retrieve(question, k=5, verbose=verbose)
+            if not candidate_chunks:
+                yield NO_RESULTS_MESSAGE
+                return
+            expanded_chunks = expand_with_links(candidate_chunks, k=3, verbose=verbose)
+            top_chunks = rerank_chunks(question, expanded_chunks, top_k=5, verbose=verbose)
         context = build_context(top_chunks, max_length=8000)
         if not context.strip():
-            return "I found data but couldn’t extract meaningful content."
+            yield NO_CONTEXT_MESSAGE
+            return
         user_message = f"Question: {question}\n\nContext:\n{context}\n\nAnswer:"
         resp = client.chat.completions.create(
             model="gpt-4o-mini",
@@ -277,20 +509,45 @@ def answer_question(question, verbose=False):
             ],
             temperature=0,
             max_tokens=600,
-            timeout=60
+            timeout=60,
+            stream=True
         )
-        answer = resp.choices[0].message.content
-        chat_history.append({"role": "user", "content": question})
-        chat_history.append({"role": "assistant", "content": answer})
-        save_session()
-        return answer
+        parts = []
+        for chunk in resp:
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                parts.append(delta)
+                yield delta
+        answer = "".join(parts)
+        new_messages = [
+            {"role": "user", "content": question},
+            {"role": "assistant", "content": answer},
+        ]
+        chat_history.extend(new_messages)
+        save_session(new_messages)
     except Exception as e:
-        return f"❌ Error while answering: {str(e)}"
+        yield f"❌ Error while answering: {str(e)}"
+        raise
+
+def answer_question(question, verbose=False, chunks=None):
+    """Blocking wrapper around stream_answer for non-streaming callers.
+
+    Swallows the re-raised pipeline exception — blocking callers (CLI,
+    evaluators) keep getting the error line as the returned text.
+    """
+    parts = []
+    try:
+        for token in stream_answer(question, verbose=verbose, chunks=chunks):
+            parts.append(token)
+    except Exception:
+        pass  # the error line was already yielded
+    return "".join(parts)
 
 # -------------------------------
 # 💬 Interactive Mode
 # -------------------------------
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     print(f"📌 New session started: {SESSION_ID}")
     print("Type 'exit' to quit.\n")
     while True:
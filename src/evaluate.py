@@ -3,14 +3,35 @@
 import os
 import csv
 import json
+import hashlib
+import threading
 import traceback
 import numpy as np
 from typing import Dict, List, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, fields
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from chat import answer_question, multi_query_retrieve, expand_with_links, rerank_chunks
+from semantic_cache import SemanticCache
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 
+try:
+    import simsimd  # SIMD cosine kernels, much faster than numpy on f32
+except ImportError:
+    simsimd = None
+
+try:
+    import orjson  # faster parse/serialize for question banks and results
+except ImportError:
+    orjson = None
+
+
+def _cosine_sims(qvec: np.ndarray, T: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a float32 query vector against each row of T."""
+    if simsimd is not None:
+        return 1.0 - np.asarray(simsimd.cdist(qvec[None, :], T, metric="cosine"))[0]
+    return T @ qvec / (np.linalg.norm(T, axis=1) * np.linalg.norm(qvec))
+
 # -----------------------------
 # 🔑 Load environment
 # -----------------------------
@@ -18,7 +39,12 @@ load_dotenv()
 OPENAI_KEY = os.environ.get("OPENAI_API_KEY")
 
 emb = OpenAIEmbeddings(model="text-embedding-3-large", openai_api_key=OPENAI_KEY)
-llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key=OPENAI_KEY, temperature=0)
+llm = ChatOpenAI(
+    model="gpt-4o-mini",
+    openai_api_key=OPENAI_KEY,
+    temperature=0,
+    model_kwargs={"response_format": {"type": "json_object"}},
+)
 
 @dataclass
 class EvaluationResult:
@@ -34,93 +60,106 @@ class EvaluationResult:
     top_chunk_preview: str = ""
     feedback: str = ""
 
+# Exact-match result cache — append-only JSONL so re-runs of the same
+# eval set (or a crashed run) replay for free
+EXACT_CACHE_FILE = "evaluation_cache.jsonl"
+
+
 class RAGEvaluator:
     def __init__(self):
         self.results: List[EvaluationResult] = []
+        # Near-duplicate questions reuse cached answers and judge scores
+        self.semantic_cache = SemanticCache()
+        self._exact_lock = threading.Lock()
+        self._exact_cache = {}
+        if os.path.exists(EXACT_CACHE_FILE):
+            with open(EXACT_CACHE_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._exact_cache[record["key"]] = record["result"]
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+
+    @staticmethod
+    def _exact_key(question: str, expected: str) -> str:
+        return hashlib.blake2b(f"{question}|{expected}".encode(), digest_size=16).hexdigest()
         
     def evaluate_answer_quality(self, question: str, answer: str, expected: str = "") -> Dict[str, float]:
         """Evaluate answer using LLM-based metrics"""
-        
-        # 1. Answer Relevance
-        relevance_prompt = f"""
+
+        # One prompt carries all three rubrics — the (question, answer,
+        # expected) payload is sent once instead of three times
+        accuracy_rubric = ""
+        if expected:
+            accuracy_rubric = f"""
+        Expected Answer: {expected}
+
+        "accuracy" — factual accuracy vs the expected answer:
+        - 1.0: Factually correct and consistent with expected answer
+        - 0.5: Mostly correct with minor inaccuracies
+        - 0.0: Contains significant factual errors
+        """
+
+        judge_prompt = f"""
         Question: {question}
         Generated Answer: {answer}
-        
-        Rate how well the answer addresses the question on a scale of 0-1:
+
+        Rate the generated answer on each metric (0-1):
+
+        "relevance" — how well the answer addresses the question:
         - 1.0: Directly and completely answers the question
         - 0.5: Partially addresses the question
         - 0.0: Doesn't address the question at all
-        
-        Return only a number between 0 and 1.
-        """
-        
-        # 2. Completeness
-        completeness_prompt = f"""
-        Question: {question}
-        Generated Answer: {answer}
-        
-        Rate how complete the answer is on a scale of 0-1:
+
+        "completeness" — how complete the answer is:
         - 1.0: Provides comprehensive, complete information
         - 0.5: Provides partial information
         - 0.0: Provides minimal or no useful information
-        
-        Return only a number between 0 and 1.
+        {accuracy_rubric}
+        Return only a JSON object with those metric names as keys.
         """
-        
-        # 3. Factual Accuracy (if expected answer provided)
-        accuracy_score = 0.0
-        if expected:
-            accuracy_prompt = f"""
-            Question: {question}
-            Expected Answer: {expected}
-            Generated Answer: {answer}
-            
-            Rate the factual accuracy on a scale of 0-1:
-            - 1.0: Factually correct and consistent with expected answer
-            - 0.5: Mostly correct with minor inaccuracies
-            - 0.0: Contains significant factual errors
-            
-            Return only a number between 0 and 1.
-            """
-            
-            try:
-                accuracy_response = llm.invoke(accuracy_prompt)
-                accuracy_score = float(accuracy_response.content.strip())
-            except:
-                accuracy_score = 0.0
-        
+
+        scores = {"relevance": 0.0, "completeness": 0.0, "accuracy": 0.0}
         try:
-            relevance_response = llm.invoke(relevance_prompt)
-            relevance_score = float(relevance_response.content.strip())
-            
-            completeness_response = llm.invoke(completeness_prompt)
-            completeness_score = float(completeness_response.content.strip())
+            response = llm.invoke(judge_prompt)
+            parsed = json.loads(response.content)
+            for key in scores:
+                if key in parsed:
+                    scores[key] = float(parsed[key])
         except:
-            relevance_score = 0.0
-            completeness_score = 0.0
-        
-        return {
-            "relevance": min(max(relevance_score, 0.0), 1.0),
-            "completeness": min(max(completeness_score, 0.0), 1.0),
-            "accuracy": min(max(accuracy_score, 0.0), 1.0)
-        }
+            pass
+
+        return {k: min(max(v, 0.0), 1.0) for k, v in scores.items()}
     
-    def calculate_retrieval_score(self, question: str, chunks: List[Any]) -> float:
-        """Calculate retrieval quality score"""
+    def calculate_retrieval_score(self, question: str, chunks: List[Any], qvec=None) -> float:
+        """Calculate retrieval quality score.
+
+        The caller can pass the query embedding it already computed
+        (evaluate_single_question embeds the question for the semantic
+        cache) so the query is never embedded twice.
+        """
         if not chunks:
             return 0.0
-            
-        qvec = emb.embed_query(question)
-        scores = []
-        
-        for chunk in chunks[:3]:  # Top 3 chunks
-            text = chunk.get("metadata", {}).get("text") or chunk.get("text", "")
-            if text:
-                tvec = emb.embed_documents([text])[0]
-                sim = float(np.dot(qvec, tvec) / (np.linalg.norm(qvec) * np.linalg.norm(tvec)))
-                scores.append(sim)
-        
-        return max(scores) if scores else 0.0
+
+        texts = [
+            (chunk.get("metadata", {}).get("text") or chunk.get("text", ""))
+            for chunk in chunks[:3]  # Top 3 chunks
+        ]
+        texts = [t for t in texts if t]
+        if not texts:
+            return 0.0
+
+        if qvec is None:
+            qvec = emb.embed_query(question)
+        q = np.asarray(qvec, dtype=np.float32)
+
+        # One embedding request covers every chunk
+        T = np.asarray(emb.embed_documents(texts), dtype=np.float32)
+
+        # All similarities in one vectorized call (SimSIMD when available)
+        sims = _cosine_sims(q, T)
+        return float(sims.max())
     
     def determine_status(self, result: EvaluationResult) -> str:
         """Determine overall status based on multiple metrics"""
@@ -139,19 +178,38 @@ class RAGEvaluator:
         """Evaluate a single question through the full pipeline"""
         
         try:
+            # 0a. Exact-match cache — identical (question, expected) pairs
+            # replay without touching the embedding model at all
+            cache_key = self._exact_key(question, expected_answer)
+            exact_hit = self._exact_cache.get(cache_key)
+            if exact_hit is not None:
+                return EvaluationResult(**exact_hit)
+
+            # 0b. Semantic cache — near-duplicate questions skip the pipeline
+            qvec = emb.embed_query(question)
+            cached = self.semantic_cache.lookup(qvec)
+            if cached is not None:
+                hit = dict(cached)
+                hit.update(
+                    question=question,
+                    expected_answer=expected_answer,
+                    feedback="semantic cache hit",
+                )
+                return EvaluationResult(**hit)
+
             # 1. Retrieval pipeline
             base_chunks = multi_query_retrieve(question, k=5)
             expanded = expand_with_links(base_chunks, k=3)
             top_chunks = rerank_chunks(question, expanded, top_k=5)
             
-            # 2. Generate answer
-            generated_answer = answer_question(question)
+            # 2. Generate answer from the chunks we already retrieved
+            generated_answer = answer_question(question, chunks=top_chunks)
             if isinstance(generated_answer, bytes):
                 generated_answer = generated_answer.decode("utf-8", errors="ignore")
             generated_answer = (generated_answer or "").strip()
             
             # 3. Calculate retrieval score
-            retrieval_score = self.calculate_retrieval_score(question, top_chunks)
+            retrieval_score = self.calculate_retrieval_score(question, top_chunks, qvec=qvec)
             
             # 4. Evaluate answer quality
             quality_metrics = self.evaluate_answer_quality(question, generated_answer, expected_answer)
@@ -180,6 +238,12 @@ class RAGEvaluator:
             )
             
             result.status = self.determine_status(result)
+            payload = asdict(result)
+            self.semantic_cache.add(qvec, payload)
+            with self._exact_lock:
+                self._exact_cache[cache_key] = payload
+                with open(EXACT_CACHE_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": cache_key, "result": payload}, ensure_ascii=False) + "\n")
             return result
             
         except Exception as e:
@@ -197,46 +261,70 @@ class RAGEvaluator:
             return ""
         return text.replace("\n", " ").strip()[:length]
     
-    def run_evaluation(self, questions_data: List[Dict], output_prefix: str = "evaluation"):
-        """Run full evaluation on a list of questions"""
-        
+    def run_evaluation(self, questions_data: List[Dict], output_prefix: str = "evaluation",
+                       max_workers: int = 8):
+        """Run full evaluation on a list of questions.
+
+        Each question spends nearly all its time waiting on OpenAI calls,
+        so questions are evaluated concurrently; progress is reported as
+        results complete.
+        """
+
         results = []
         status_counts = {}
         total_scores = {
             "retrieval": 0.0,
-            "relevance": 0.0, 
+            "relevance": 0.0,
             "accuracy": 0.0,
             "completeness": 0.0,
             "overall": 0.0
         }
-        
-        for i, item in enumerate(questions_data, 1):
+
+        items = []
+        for item in questions_data:
             if isinstance(item, dict):
-                question = item.get("question", "")
-                expected = item.get("expected_answer", "")
+                items.append((item.get("question", ""), item.get("expected_answer", "")))
             else:
-                question = str(item)
-                expected = ""
-                
-            print(f"\n[{i}/{len(questions_data)}] Evaluating: {question[:80]}...")
-            
-            result = self.evaluate_single_question(question, expected)
-            results.append(result)
-            
-            # Update counters
-            status_counts[result.status] = status_counts.get(result.status, 0) + 1
-            total_scores["retrieval"] += result.retrieval_score
-            total_scores["relevance"] += result.answer_relevance
-            total_scores["accuracy"] += result.factual_accuracy
-            total_scores["completeness"] += result.completeness
-            total_scores["overall"] += result.overall_score
-            
-            print(f"→ Overall: {result.overall_score:.3f} | Status: {result.status}")
-            print(f"  Retrieval: {result.retrieval_score:.3f} | Relevance: {result.answer_relevance:.3f}")
-            
-            # Periodic save
-            if i % 50 == 0:
-                self.save_results(results, f"{output_prefix}_partial")
+                items.append((str(item), ""))
+
+        # Stream results to disk as they complete instead of rewriting the
+        # whole (growing) list every 50 questions
+        csv_file = f"{output_prefix}.csv"
+        jsonl_file = f"{output_prefix}.jsonl"
+        fieldnames = [f.name for f in fields(EvaluationResult)]
+
+        with open(csv_file, "w", newline="", encoding="utf-8") as cf, \
+             open(jsonl_file, "w", encoding="utf-8") as jf, \
+             ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+            writer = csv.DictWriter(cf, fieldnames=fieldnames)
+            writer.writeheader()
+
+            futures = [
+                pool.submit(self.evaluate_single_question, question, expected)
+                for question, expected in items
+            ]
+
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+
+                # Update counters
+                status_counts[result.status] = status_counts.get(result.status, 0) + 1
+                total_scores["retrieval"] += result.retrieval_score
+                total_scores["relevance"] += result.answer_relevance
+                total_scores["accuracy"] += result.factual_accuracy
+                total_scores["completeness"] += result.completeness
+                total_scores["overall"] += result.overall_score
+
+                print(f"\n[{i}/{len(items)}] {result.question[:80]}...")
+                print(f"→ Overall: {result.overall_score:.3f} | Status: {result.status}")
+                print(f"  Retrieval: {result.retrieval_score:.3f} | Relevance: {result.answer_relevance:.3f}")
+
+                # Incremental O(1) persistence per result
+                row = asdict(result)
+                writer.writerow(row)
+                jf.write(json.dumps(row, ensure_ascii=False) + "\n")
         
         # Calculate averages
         n = len(results)
@@ -283,9 +371,16 @@ class RAGEvaluator:
         
         # Save JSON
         json_file = f"{filename_prefix}.json"
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(results_data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(json_file, "wb") as f:
+                f.write(orjson.dumps(results_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_file, "w", encoding="utf-8") as f:
+                json.dump(results_data, f, ensure_ascii=False, indent=2)
         
+        # Persist the semantic cache alongside the results
+        self.semantic_cache.save()
+
         print(f"💾 Results saved: {csv_file}, {json_file}")
 
 
@@ -300,9 +395,13 @@ def load_questions_from_json(filepath: str) -> List[Dict]:
         return None
     
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
+        if orjson is not None:
+            with open(filepath, "rb") as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
         print(f"✅ JSON file loaded successfully")
         print(f"📊 Data type: {type(data)}")
         
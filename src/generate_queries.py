@@ -1,9 +1,11 @@
 # src/generate_queries.py
 import os
 import json
+import time
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import OpenAI, RateLimitError
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # -------------------------------
 # 🔑 Load API key
@@ -22,27 +24,28 @@ OUT_FILE = "Constitution_Que.json"
 def extract_sections_from_json():
     """Extract text fields from all JSON files."""
     sections = []
-    for fname in os.listdir(DATA_DIR):
-        if fname.lower().endswith(".json"):
-            path = os.path.join(DATA_DIR, fname)
-            with open(path, "r", encoding="utf-8") as f:
+    with os.scandir(DATA_DIR) as it:
+        for entry in it:
+            if not (entry.is_file() and entry.name.lower().endswith(".json")):
+                continue
+            fname = entry.name
+            with open(entry.path, "r", encoding="utf-8") as f:
                 try:
                     data = json.load(f)
                 except Exception as e:
                     print(f"⚠️ Skipping {fname}, invalid JSON: {e}")
                     continue
 
-            def walk(node):
+            # Iterative walk — no per-node call frames, no recursion limit
+            stack = [data]
+            while stack:
+                node = stack.pop()
                 if isinstance(node, dict):
-                    if "text" in node and isinstance(node["text"], str):
+                    if isinstance(node.get("text"), str):
                         sections.append({"source": fname, "text": node["text"]})
-                    for v in node.values():
-                        walk(v)
+                    stack.extend(node.values())
                 elif isinstance(node, list):
-                    for v in node:
-                        walk(v)
-
-            walk(data)
+                    stack.extend(node)
     return sections
 
 
@@ -79,6 +82,19 @@ def generate_queries_for_section(section_text, source):
     return questions
 
 
+def _generate_with_retry(section_text, source, retries=3):
+    """Retry on rate limits with exponential backoff; empty list on give-up."""
+    for attempt in range(retries):
+        try:
+            return generate_queries_for_section(section_text, source)
+        except RateLimitError:
+            time.sleep(2 ** attempt)
+        except Exception as e:
+            print(f"⚠️ Generation failed for {source}: {e}")
+            return []
+    return []
+
+
 # -------------------------------
 # 🚀 Main
 # -------------------------------
@@ -91,29 +107,38 @@ def main():
     for sec in sections:
         grouped[sec["source"]].append(sec)
 
-    all_questions = []
-    counter = 1
-
     for fname, secs in grouped.items():
         print(f"\n📄 Processing {fname} ({len(secs)} chunks)")
 
-        for sec in secs:
-            qs = generate_queries_for_section(sec["text"], fname)
-            for q in qs:
-                all_questions.append({
-                    "id": counter,
-                    "question": q,
-                    "source": fname
-                })
-                counter += 1
-
-    # Deduplicate by question text
+    # Sections are independent — generate concurrently, keeping results in
+    # submission order so question ids stay deterministic
+    ordered = [sec for secs in grouped.values() for sec in secs]
+    question_lists = [None] * len(ordered)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = {
+            pool.submit(_generate_with_retry, sec["text"], sec["source"]): i
+            for i, sec in enumerate(ordered)
+        }
+        for future in as_completed(futures):
+            question_lists[futures[future]] = future.result()
+
+    # Deduplicate while accumulating — whitespace-normalized, case-folded
+    # keys catch near-identical phrasings in the same pass
     seen = set()
     unique_questions = []
-    for item in all_questions:
-        if item["question"] not in seen:
-            unique_questions.append(item)
-            seen.add(item["question"])
+    counter = 1
+    for sec, qs in zip(ordered, question_lists):
+        for q in qs or []:
+            key = " ".join(q.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_questions.append({
+                "id": counter,
+                "question": q,
+                "source": sec["source"]
+            })
+            counter += 1
 
     out_path = os.path.join(os.path.dirname(__file__), OUT_FILE)
     with open(out_path, "w", encoding="utf-8") as f:
@@ -3,13 +3,31 @@ import json
 import time
 import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from typing import List, Dict, Any
+import numpy as np
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
 from pinecone import Pinecone, ServerlessSpec
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+try:
+    import orjson  # much faster JSON parsing for large corpus files
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # event-streaming parser for very large acts
+except ImportError:
+    ijson = None
+
+try:
+    import xxhash  # SIMD-accelerated non-cryptographic hashing for doc ids
+except ImportError:
+    xxhash = None
+
 # =============================
 # Configuration
 # =============================
@@ -17,12 +35,18 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 # Chunking configuration
 CHUNK_SIZE = 800  # Optimal for legal text density
 CHUNK_OVERLAP = 150  # Maintains context between chunks
-CHUNK_SEPARATORS = ["\n\n", "\n", ".", " "]  # Split on natural breaks
+CHUNK_SEPARATORS = ("\n\n", "\n", ".", " ")  # Split on natural breaks
 
 # Batch sizes
 EMBEDDING_BATCH_SIZE = 500  # Process embeddings in batches to avoid memory issues
 PINECONE_BATCH_SIZE = 100  # Max recommended by Pinecone
 
+# Concurrency — embedding batches and upserts are network-bound; keep
+# in-flight requests bounded so we stay under the providers' rate limits
+EMBED_MAX_WORKERS = 8
+UPSERT_MAX_WORKERS = 8
+FILE_MAX_WORKERS = 4  # files ingested in parallel (each fans out further)
+
 # Retry configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
@@ -51,6 +75,14 @@ class Config:
     data_dir: str
     chunk_size: int = CHUNK_SIZE
     chunk_overlap: int = CHUNK_OVERLAP
+    embed_workers: int = EMBED_MAX_WORKERS
+    file_concurrency: int = FILE_MAX_WORKERS
+    # Known constant for text-embedding-3-small at 512 dims (see main());
+    # avoids a probe embedding call per file just to learn the dimension
+    embedding_dim: int = 512
+    # Hold embeddings as float16 between embed and upsert — halves peak
+    # RAM on big acts at ~0.01 cosine drift; cast back to float32 per batch
+    fp16_embeddings: bool = True
     
     @classmethod
     def from_env(cls) -> 'Config':
@@ -84,13 +116,22 @@ class Config:
 # Text Splitter
 # =============================
 
+_SPLITTER = None
+
 def create_text_splitter(config: Config) -> RecursiveCharacterTextSplitter:
-    """Create configured text splitter."""
-    return RecursiveCharacterTextSplitter(
-        chunk_size=config.chunk_size,
-        chunk_overlap=config.chunk_overlap,
-        separators=CHUNK_SEPARATORS
-    )
+    """Return the shared text splitter, building it on first use.
+
+    The splitter is stateless, so one instance serves every document and
+    repeated construction (and LangChain's internal setup) is avoided.
+    """
+    global _SPLITTER
+    if _SPLITTER is None:
+        _SPLITTER = RecursiveCharacterTextSplitter(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            separators=list(CHUNK_SEPARATORS)
+        )
+    return _SPLITTER
 
 def chunk_text(text: str, splitter: RecursiveCharacterTextSplitter) -> List[str]:
     """Split long text into smaller overlapping chunks."""
@@ -105,12 +146,16 @@ def chunk_text(text: str, splitter: RecursiveCharacterTextSplitter) -> List[str]
 def load_json_file(path: str) -> dict:
     """Load and parse a JSON file."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
+        if orjson is not None:
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
         if not isinstance(data, dict):
             raise ValueError(f"Expected JSON object, got {type(data)}")
-        
+
         return data
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in {path}: {e}")
@@ -119,6 +164,29 @@ def load_json_file(path: str) -> dict:
         logger.error(f"Error reading {path}: {e}")
         raise
 
+def load_act_streaming(path: str) -> dict:
+    """Load an act without materializing the whole parsed document.
+
+    Act-level scalar fields are read in one cheap scan that stops at the
+    chapters array; chapters themselves are exposed as a generator so only
+    one chapter is resident at a time. Shape-compatible with iter_docs.
+    """
+    scalar_keys = ("act_title", "act_number", "date_of_commencement", "preamble")
+    meta = {}
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f):
+            if prefix in scalar_keys and event == "string":
+                meta[prefix] = value
+            elif prefix == "chapters" and event == "start_array":
+                break
+
+    def chapters():
+        with open(path, "rb") as f:
+            yield from ijson.items(f, "chapters.item")
+
+    meta["chapters"] = chapters()
+    return meta
+
 def detect_type(fname: str) -> str:
     """Detect document type from filename."""
     name = fname.lower()
@@ -133,6 +201,30 @@ def detect_type(fname: str) -> str:
     else:
         return "misc"
 
+def _meta_passthrough(v):
+    return v
+
+def _meta_list(v):
+    # List of strings is Pinecone-safe; anything else becomes pipe-separated
+    if all(isinstance(x, str) for x in v):
+        return v
+    return " | ".join(str(x) for x in v)
+
+def _meta_dict(v):
+    # Flatten nested dicts to a pipe-separated string
+    return " | ".join(f"{ik}:{iv}" for ik, iv in v.items() if iv is not None)
+
+# Exact-type dispatch table: one C-level hash lookup per value instead of
+# a chain of isinstance checks. Unknown types fall back to str().
+_META_HANDLERS = {
+    str: _meta_passthrough,
+    int: _meta_passthrough,
+    float: _meta_passthrough,
+    bool: _meta_passthrough,
+    list: _meta_list,
+    dict: _meta_dict,
+}
+
 def sanitize_metadata(meta: Dict[str, Any]) -> Dict[str, Any]:
     """
     Ensure Pinecone-safe metadata (string, number, bool, list[str]).
@@ -143,34 +235,32 @@ def sanitize_metadata(meta: Dict[str, Any]) -> Dict[str, Any]:
         # Skip None values
         if v is None:
             continue
-            
-        # Direct types
-        if isinstance(v, (str, int, float, bool)):
-            safe[k] = v
-        # List of strings
-        elif isinstance(v, list):
-            if all(isinstance(x, str) for x in v):
-                safe[k] = v
-            else:
-                # Convert list to pipe-separated string
-                safe[k] = " | ".join([str(x) for x in v])
-        # Flatten dictionaries
-        elif isinstance(v, dict):
-            # Option 1: Flatten to string (current approach)
-            safe[k] = " | ".join(f"{ik}:{iv}" for ik, iv in v.items() if iv is not None)
-            # Option 2: Create separate keys (uncomment if preferred)
-            # for dk, dv in v.items():
-            #     safe[f"{k}_{dk}"] = str(dv)
-        else:
-            safe[k] = str(v)
-    
+        safe[k] = _META_HANDLERS.get(type(v), str)(v)
     return safe
 
+def sanitize_metadata_batch(metas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sanitize a whole file's metadata in one pass.
+
+    Same rules as sanitize_metadata, but with the handler lookup bound to
+    a local and a single call site instead of one call per chunk.
+    """
+    get = _META_HANDLERS.get
+    return [
+        {k: get(type(v), str)(v) for k, v in meta.items() if v is not None}
+        for meta in metas
+    ]
+
 def generate_doc_id(filename: str, index: int, text: str) -> str:
     """
     Generate unique document ID with content hash to prevent duplicates.
     """
-    content_hash = hashlib.md5(text.encode()).hexdigest()[:8]
+    # IDs need no cryptographic strength — xxh3 hashes at memory speed;
+    # blake2b (faster than md5, digest_size=4 → exactly 8 hex chars) is
+    # the stdlib fallback
+    if xxhash is not None:
+        content_hash = xxhash.xxh3_64_hexdigest(text)
+    else:
+        content_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=4).hexdigest()
     return f"{filename}___{index}___{content_hash}"
 
 # =============================
@@ -186,15 +276,55 @@ def validate_data_structure(data: dict) -> None:
     if "chapters" not in data and "preamble" not in data:
         raise ValueError("Data must contain 'chapters' or 'preamble'")
 
-def normalize_docs(data: dict, splitter: RecursiveCharacterTextSplitter) -> List[Dict[str, Any]]:
+def _chunked(doc: Dict[str, Any], splitter: RecursiveCharacterTextSplitter):
+    """Split one normalized doc and yield the final chunk-sized dicts."""
+    # Section docs carry precomputed keywords (built once per section in
+    # iter_docs); only docs outside a section fall back to building them
+    keywords = doc.get("keywords")
+    if keywords is None:
+        keywords = f"{doc.get('section_title','')} {doc.get('chapter_title','')}".strip()
+    chunks = chunk_text(doc["text"], splitter)
+
+    if chunks:
+        total = len(chunks)
+        for chunk_idx, ch in enumerate(chunks):
+            # One merged dict literal per chunk — cheaper than copy() plus
+            # five item assignments, and yields a fresh dict the consumer
+            # may mutate
+            yield {
+                **doc,
+                "text": ch,
+                "chunk_index": chunk_idx,
+                "total_chunks": total,
+                "is_chunked": True,
+                "keywords": keywords,
+            }
+    else:
+        # No chunking needed
+        doc["chunk_index"] = 0
+        doc["total_chunks"] = 1
+        doc["is_chunked"] = False
+        doc["keywords"] = keywords
+        yield doc
+
+# Precompiled %-templates for the normalization hot loop — the template is
+# parsed once at import instead of rebuilding f-string bytecode per doc
+_SEC_FMT = "Section %s — %s: %s"
+_SUB_FMT = "Section %s%s: %s"
+_EXP_FMT = "Explanation %s: %s"
+_TERM_FMT = "%s: %s"
+_TYPE_FMT = "%s — %s"
+
+def iter_docs(data: dict, splitter: RecursiveCharacterTextSplitter):
     """
-    Normalize Criminal Law Acts into docs with `text` + metadata.
+    Normalize Criminal Law Acts into chunk-ready docs with `text` + metadata.
     Handles: Chapters → Sections → Sub-sections → Clauses → Explanations.
+
+    Generator: normalization and chunking are fused, so only the final
+    chunk-sized dicts are ever materialized — no intermediate docs list.
     """
     # Validate input
     validate_data_structure(data)
-    
-    docs = []
 
     # Extract act-level metadata
     act_title = data.get("act_title", "")
@@ -204,197 +334,185 @@ def normalize_docs(data: dict, splitter: RecursiveCharacterTextSplitter) -> List
 
     # Process Preamble
     if preamble and preamble.strip():
-        docs.append({
+        yield from _chunked({
             "text": f"Preamble: {preamble}",
             "act_title": act_title,
             "act_number": act_number,
             "date_of_commencement": act_date,
             "doc_type": "preamble"
-        })
+        }, splitter)
 
     # Process Chapters
     for ch in data.get("chapters", []):
-        ch_num = ch.get("chapter_number")
-        ch_title = ch.get("chapter_title")
-
         # Process Sections
         for sec in ch.get("sections", []):
             sec_num = sec.get("section_number", "")
-            sec_title = sec.get("section_title", "")
             sec_text = sec.get("text", "")
 
+            # Shared positional metadata for everything inside this section
+            chapter_title = ch.get("chapter_title")
+            section_title = sec.get("section_title", "")
+            base = {
+                "chapter_number": ch.get("chapter_number"),
+                "chapter_title": chapter_title,
+                "section_number": sec_num,
+                "section_title": section_title,
+                "act_title": act_title,
+                # Same for every doc in this section — concat once here
+                # instead of once per subsection/clause/explanation
+                "keywords": f"{section_title} {chapter_title or ''}".strip(),
+            }
+
             # Section main text
             if sec_text and sec_text.strip():
-                docs.append({
-                    "text": f"Section {sec_num} — {sec_title}: {sec_text}",
-                    "chapter_number": ch_num,
-                    "chapter_title": ch_title,
-                    "section_number": sec_num,
-                    "section_title": sec_title,
-                    "act_title": act_title,
+                yield from _chunked({
+                    **base,
+                    "text": _SEC_FMT % (sec_num, base["section_title"], sec_text),
                     "act_number": act_number,
                     "doc_type": "section"
-                })
+                }, splitter)
 
             # Process Sub-sections
             for sub in sec.get("sub_sections", []):
                 text = sub.get("text", "")
                 if sub.get("term") and sub.get("definition"):
-                    text = f"{sub['term']}: {sub['definition']}"
-                
+                    text = _TERM_FMT % (sub["term"], sub["definition"])
+
                 if text and text.strip():
-                    docs.append({
-                        "text": f"Section {sec_num}{sub.get('sub_section_number','')}: {text}",
-                        "chapter_number": ch_num,
-                        "chapter_title": ch_title,
-                        "section_number": sec_num,
-                        "section_title": sec_title,
+                    yield from _chunked({
+                        **base,
+                        "text": _SUB_FMT % (sec_num, sub.get("sub_section_number", ""), text),
                         "sub_section_number": sub.get("sub_section_number"),
-                        "act_title": act_title,
                         "doc_type": "subsection"
-                    })
+                    }, splitter)
 
             # Process Clauses
             for clause in sec.get("clauses", []):
                 clause_text = clause.get("text", "")
                 if clause_text and clause_text.strip():
-                    docs.append({
-                        "text": f"Section {sec_num}{clause.get('clause_label','')}: {clause_text}",
-                        "chapter_number": ch_num,
-                        "chapter_title": ch_title,
-                        "section_number": sec_num,
-                        "section_title": sec_title,
+                    yield from _chunked({
+                        **base,
+                        "text": _SUB_FMT % (sec_num, clause.get("clause_label", ""), clause_text),
                         "clause_label": clause.get("clause_label"),
-                        "act_title": act_title,
                         "doc_type": "clause"
-                    })
+                    }, splitter)
 
             # Process Explanations
             for exp in sec.get("explanations", []):
                 if "types" in exp:
                     for t in exp["types"]:
-                        type_text = f"{t.get('type','')} — {t.get('definition','')}"
+                        type_text = _TYPE_FMT % (t.get("type", ""), t.get("definition", ""))
                         if type_text.strip():
-                            docs.append({
-                                "text": f"Explanation {exp.get('explanation_number','')}: {type_text}",
-                                "chapter_number": ch_num,
-                                "chapter_title": ch_title,
-                                "section_number": sec_num,
-                                "section_title": sec_title,
+                            yield from _chunked({
+                                **base,
+                                "text": _EXP_FMT % (exp.get("explanation_number", ""), type_text),
                                 "explanation_number": exp.get("explanation_number"),
-                                "act_title": act_title,
                                 "doc_type": "explanation"
-                            })
+                            }, splitter)
                 else:
                     exp_content = exp.get("content", "")
                     if exp_content and exp_content.strip():
-                        docs.append({
-                            "text": f"Explanation {exp.get('explanation_number','')}: {exp_content}",
-                            "chapter_number": ch_num,
-                            "chapter_title": ch_title,
-                            "section_number": sec_num,
-                            "section_title": sec_title,
+                        yield from _chunked({
+                            **base,
+                            "text": _EXP_FMT % (exp.get("explanation_number", ""), exp_content),
                             "explanation_number": exp.get("explanation_number"),
-                            "act_title": act_title,
                             "doc_type": "explanation"
-                        })
-
-    # Apply chunking and enrich metadata
-    cleaned = []
-    for d in docs:
-        # Ensure document has text
-        if isinstance(d, str):
-            d = {"text": d}
-        elif isinstance(d, dict):
-            if "text" not in d or not d["text"]:
-                d["text"] = str(d)
-        else:
-            d = {"text": str(d)}
-
-        # Chunk the text
-        chunks = chunk_text(d["text"], splitter)
-        
-        if chunks:
-            for chunk_idx, ch in enumerate(chunks):
-                new_doc = d.copy()
-                new_doc["text"] = ch
-                new_doc["chunk_index"] = chunk_idx
-                new_doc["total_chunks"] = len(chunks)
-                new_doc["is_chunked"] = True
-                new_doc["keywords"] = f"{new_doc.get('section_title','')} {new_doc.get('chapter_title','')}".strip()
-                cleaned.append(new_doc)
-        else:
-            # No chunking needed
-            d["chunk_index"] = 0
-            d["total_chunks"] = 1
-            d["is_chunked"] = False
-            d["keywords"] = f"{d.get('section_title','')} {d.get('chapter_title','')}".strip()
-            cleaned.append(d)
+                        }, splitter)
 
-    logger.info(f"Normalized {len(docs)} documents into {len(cleaned)} chunks")
-    return cleaned
+def normalize_docs(data: dict, splitter: RecursiveCharacterTextSplitter) -> List[Dict[str, Any]]:
+    """Materialized wrapper around iter_docs (kept for external callers)."""
+    return list(iter_docs(data, splitter))
 
 # =============================
 # Pinecone Operations
 # =============================
 
-def create_or_get_index(pc: Pinecone, index_name: str, dimension: int, 
+# Known index names, fetched once per process — concurrent per-file calls
+# to create_or_get_index shouldn't each pay a list_indexes round-trip
+_known_indexes = None
+_index_lock = threading.Lock()
+
+def create_or_get_index(pc: Pinecone, index_name: str, dimension: int,
                         environment: str, max_wait: int = 60) -> Any:
     """
     Create Pinecone index if it doesn't exist, or get existing index.
-    Waits for index to be ready.
+    Existing indexes are returned without any polling; freshly created
+    ones are awaited with exponential backoff starting at 100 ms.
     """
-    existing_indexes = pc.list_indexes().names()
-    
-    if index_name not in existing_indexes:
-        logger.info(f"Creating new Pinecone index: {index_name}")
-        pc.create_index(
-            name=index_name,
-            dimension=dimension,
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region=environment)
-        )
-        
-        # Wait for index to be ready
-        logger.info("Waiting for index to be ready...")
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
-            try:
-                status = pc.describe_index(index_name).status
-                if status.get('ready', False):
-                    logger.info("Index is ready!")
-                    break
-            except Exception as e:
-                logger.warning(f"Error checking index status: {e}")
-            
-            time.sleep(2)
+    global _known_indexes
+
+    with _index_lock:
+        if _known_indexes is None:
+            _known_indexes = set(pc.list_indexes().names())
+
+        if index_name not in _known_indexes:
+            logger.info(f"Creating new Pinecone index: {index_name}")
+            pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region=environment)
+            )
+
+            # Wait for index to be ready — back off exponentially so a fast
+            # index costs ~100 ms, not a fixed 2 s poll interval
+            logger.info("Waiting for index to be ready...")
+            waited = 0.0
+            delay = 0.1
+            ready = False
+            while waited < max_wait:
+                try:
+                    status = pc.describe_index(index_name).status
+                    if status.get('ready', False):
+                        logger.info("Index is ready!")
+                        ready = True
+                        break
+                except Exception as e:
+                    logger.warning(f"Error checking index status: {e}")
+
+                time.sleep(delay)
+                waited += delay
+                delay = min(delay * 2, 6.4)
+
+            if not ready:
+                raise TimeoutError(f"Index {index_name} did not become ready within {max_wait}s")
+
+            _known_indexes.add(index_name)
         else:
-            raise TimeoutError(f"Index {index_name} did not become ready within {max_wait}s")
-    else:
-        logger.info(f"Using existing index: {index_name}")
-    
+            logger.info(f"Using existing index: {index_name}")
+
     return pc.Index(index_name)
 
-def embed_documents_in_batches(texts: List[str], embeddings: OpenAIEmbeddings, 
-                               batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+def embed_documents_in_batches(texts: List[str], embeddings: OpenAIEmbeddings,
+                               batch_size: int = EMBEDDING_BATCH_SIZE,
+                               max_workers: int = EMBED_MAX_WORKERS,
+                               as_fp16: bool = False) -> List[Any]:
     """
-    Create embeddings in batches to avoid memory issues and respect rate limits.
+    Create embeddings in batches, dispatching batches concurrently.
+
+    The work is pure network I/O, so overlapping round-trips gives a
+    near-linear speedup up to the rate limit; results are written back by
+    slice so output order matches input order. With as_fp16, each batch is
+    stored as float16 rows — half the resident memory of Python float
+    lists many times over — and cast back to float32 at upsert time.
     """
-    all_embeddings = []
-    total_batches = (len(texts) + batch_size - 1) // batch_size
-    
-    for i in range(0, len(texts), batch_size):
-        batch_texts = texts[i:i+batch_size]
-        batch_num = (i // batch_size) + 1
-        
+    all_embeddings: List[Any] = [None] * len(texts)
+    starts = list(range(0, len(texts), batch_size))
+    total_batches = len(starts)
+
+    def embed_slice(start: int) -> List[Any]:
+        batch_texts = texts[start:start+batch_size]
+        batch_num = (start // batch_size) + 1
+
         logger.info(f"Creating embeddings for batch {batch_num}/{total_batches} ({len(batch_texts)} texts)")
-        
+
         # Retry logic for API failures
         for attempt in range(MAX_RETRIES):
             try:
-                batch_embeddings = embeddings.embed_documents(batch_texts)
-                all_embeddings.extend(batch_embeddings)
-                break
+                vecs = embeddings.embed_documents(batch_texts)
+                if as_fp16:
+                    return list(np.asarray(vecs, dtype=np.float16))
+                return vecs
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait_time = RETRY_DELAY * (attempt + 1)
@@ -404,38 +522,58 @@ def embed_documents_in_batches(texts: List[str], embeddings: OpenAIEmbeddings,
                 else:
                     logger.error(f"Failed to create embeddings after {MAX_RETRIES} attempts")
                     raise
-    
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(embed_slice, start): start for start in starts}
+        for future in as_completed(futures):
+            start = futures[future]
+            all_embeddings[start:start+batch_size] = future.result()
+
     return all_embeddings
 
-def upsert_to_pinecone(index: Any, embeddings: List[List[float]], 
-                      metadatas: List[Dict], filename: str, 
-                      batch_size: int = PINECONE_BATCH_SIZE) -> None:
+def upsert_to_pinecone(index: Any, embeddings: List[List[float]],
+                      metadatas: List[Dict], filename: str,
+                      batch_size: int = PINECONE_BATCH_SIZE,
+                      max_workers: int = UPSERT_MAX_WORKERS) -> None:
     """
-    Upsert embeddings to Pinecone in batches with retry logic.
+    Upsert embeddings to Pinecone, pipelining batches concurrently.
+
+    Each batch is a ~100-vector HTTPS round-trip; overlapping them hides
+    the network latency. Retry semantics stay per batch.
     """
     total_vectors = len(embeddings)
     total_batches = (total_vectors + batch_size - 1) // batch_size
-    
+
     logger.info(f"Uploading {total_vectors} vectors in {total_batches} batches...")
-    
-    for i in range(0, len(embeddings), batch_size):
-        batch_embeddings = embeddings[i:i+batch_size]
-        batch_metadatas = metadatas[i:i+batch_size]
+
+    # Precompute every vector id in one pass instead of hashing inside the
+    # per-batch loop. "text" stays in the metadata — retrieval in chat.py
+    # reads chunk text from there.
+    ids = [
+        generate_doc_id(filename, i, meta.get("text", ""))
+        for i, meta in enumerate(metadatas)
+    ]
+
+    def upsert_batch(i: int) -> None:
         batch_num = (i // batch_size) + 1
-        
-        # Prepare batch
-        vectors = []
-        for j, vec in enumerate(batch_embeddings):
-            idx = i + j
-            _id = generate_doc_id(filename, idx, metadatas[idx].get("text", ""))
-            vectors.append((_id, vec, batch_metadatas[j]))
-        
+        # Pinecone takes float32 on the wire — cast any fp16 rows back
+        # just-in-time so only one batch is ever widened at once
+        values = [
+            v.astype(np.float32).tolist() if isinstance(v, np.ndarray) else v
+            for v in embeddings[i:i+batch_size]
+        ]
+        vectors = list(zip(
+            ids[i:i+batch_size],
+            values,
+            metadatas[i:i+batch_size],
+        ))
+
         # Upsert with retry logic
         for attempt in range(MAX_RETRIES):
             try:
                 index.upsert(vectors=vectors)
                 logger.info(f"Uploaded batch {batch_num}/{total_batches} ({len(vectors)} vectors)")
-                break
+                return
             except Exception as e:
                 if attempt < MAX_RETRIES - 1:
                     wait_time = RETRY_DELAY * (attempt + 1)
@@ -446,6 +584,11 @@ def upsert_to_pinecone(index: Any, embeddings: List[List[float]],
                     logger.error(f"Failed to upsert batch after {MAX_RETRIES} attempts")
                     raise
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(upsert_batch, i) for i in range(0, len(embeddings), batch_size)]
+        for future in as_completed(futures):
+            future.result()
+
 # =============================
 # Main Ingestion Function
 # =============================
@@ -459,57 +602,74 @@ def ingest_json(json_path: str, config: Config, pc: Pinecone,
     filename = os.path.basename(json_path)
     logger.info(f"{'[DRY RUN] ' if dry_run else ''}Processing {filename}")
     
-    # Load and normalize data
+    # Detect document type
+    ftype = detect_type(filename)
+
+    # Load, normalize and collect — iter_docs streams chunk-sized dicts,
+    # so texts and metadata are built in one pass
+    all_texts = []
+    metadatas = []
     try:
-        data = load_json_file(json_path)
-        docs = normalize_docs(data, splitter)
+        # Stream large acts chapter-by-chapter when ijson is installed;
+        # otherwise fall back to loading the whole document
+        data = load_act_streaming(json_path) if ijson is not None else load_json_file(json_path)
+        for doc in iter_docs(data, splitter):
+            # iter_docs yields freshly built dicts, so annotate in place —
+            # no second copy per chunk. "text" kept: retrieval reads it
+            # from metadata.
+            doc["source"] = filename
+            doc["type"] = ftype
+            all_texts.append(doc["text"])
+            metadatas.append(doc)
+        # One sanitization pass over the whole file
+        metadatas = sanitize_metadata_batch(metadatas)
     except (ValueError, KeyError) as e:
         logger.error(f"Data validation error in {filename}: {e}", exc_info=True)
         raise
     except Exception as e:
         logger.error(f"Unexpected error processing {filename}: {e}", exc_info=True)
         raise
-    
-    if not docs:
+
+    if not all_texts:
         logger.warning(f"No documents extracted from {filename}")
         return
-    
-    if not docs[0].get("text", "").strip():
+
+    if not all_texts[0].strip():
         raise ValueError(f"No usable text found in {filename}")
-    
-    logger.info(f"Extracted {len(docs)} document chunks from {filename}")
-    
+
+    logger.info(f"Extracted {len(all_texts)} document chunks from {filename}")
+
     if dry_run:
         logger.info("[DRY RUN] Skipping embedding and upload")
-        logger.info(f"[DRY RUN] Would process {len(docs)} documents")
-        logger.info(f"[DRY RUN] Sample document: {docs[0]}")
+        logger.info(f"[DRY RUN] Would process {len(all_texts)} documents")
+        logger.info(f"[DRY RUN] Sample document: {metadatas[0]}")
         return
-    
+
     # Get or create index
-    sample_vec = embeddings.embed_query(docs[0]["text"])
-    dimension = len(sample_vec)
-    index = create_or_get_index(pc, config.index_name, dimension, config.pinecone_env)
-    
-    # Detect document type
-    ftype = detect_type(filename)
-    
-    # Prepare texts and metadata
-    all_texts = []
-    metadatas = []
-    for doc in docs:
-        text = doc.get("text", "")
-        meta = {k: v for k, v in doc.items() if k != "text"}
-        meta["source"] = filename
-        meta["type"] = ftype
-        meta["text"] = text  # Keep for ID generation
-        meta = sanitize_metadata(meta)
-        
-        all_texts.append(text)
-        metadatas.append(meta)
-    
+    index = create_or_get_index(pc, config.index_name, config.embedding_dim, config.pinecone_env)
+
+    # Deduplicate identical chunk texts before embedding — legal acts repeat
+    # preambles, citations and boilerplate, and embedding the same string
+    # twice wastes both time and API spend. Each upsert keeps its own
+    # metadata; only the embedding call is shared.
+    unique_index: Dict[str, int] = {}
+    unique_texts: List[str] = []
+    idx_map = []
+    for t in all_texts:
+        pos = unique_index.setdefault(t, len(unique_texts))
+        if pos == len(unique_texts):
+            unique_texts.append(t)
+        idx_map.append(pos)
+
+    if len(unique_texts) < len(all_texts):
+        logger.info(f"Deduplicated {len(all_texts) - len(unique_texts)} identical chunks before embedding")
+
     # Create embeddings in batches
-    logger.info(f"Creating embeddings for {len(all_texts)} texts...")
-    embeddings_list = embed_documents_in_batches(all_texts, embeddings)
+    logger.info(f"Creating embeddings for {len(unique_texts)} texts...")
+    embedded_unique = embed_documents_in_batches(unique_texts, embeddings,
+                                                 max_workers=config.embed_workers,
+                                                 as_fp16=config.fp16_embeddings)
+    embeddings_list = [embedded_unique[i] for i in idx_map]
     
     # Upload to Pinecone
     upsert_to_pinecone(index, embeddings_list, metadatas, filename)
@@ -533,8 +693,10 @@ def main(dry_run: bool = False) -> None:
         
         # Initialize clients
         pc = Pinecone(api_key=config.pinecone_key)
+        # Must match the retrieval model/dimension in chat.py
         embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-large", 
+            model="text-embedding-3-small",
+            dimensions=512,
             openai_api_key=config.openai_key
         )
         splitter = create_text_splitter(config)
@@ -553,18 +715,26 @@ def main(dry_run: bool = False) -> None:
         
         logger.info(f"Found {len(files)} JSON files: {files}")
         
-        # Process each file
+        # Process files concurrently — each file's embedding/upsert time is
+        # independent network I/O (the OpenAI and Pinecone clients are
+        # thread-safe for concurrent requests)
         success_count = 0
         failed_files = []
-        
-        for fname in files:
-            fpath = os.path.join(config.data_dir, fname)
-            try:
-                ingest_json(fpath, config, pc, embeddings, splitter, dry_run)
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to process {fname}: {e}", exc_info=True)
-                failed_files.append(fname)
+
+        with ThreadPoolExecutor(max_workers=config.file_concurrency) as pool:
+            futures = {
+                pool.submit(ingest_json, os.path.join(config.data_dir, fname),
+                            config, pc, embeddings, splitter, dry_run): fname
+                for fname in files
+            }
+            for future in as_completed(futures):
+                fname = futures[future]
+                try:
+                    future.result()
+                    success_count += 1
+                except Exception as e:
+                    logger.error(f"Failed to process {fname}: {e}", exc_info=True)
+                    failed_files.append(fname)
         
         # Summary
         logger.info("=" * 60)
@@ -32,8 +32,13 @@ except:
         "databaseURL": ""
     }
 
-firebase = pyrebase.initialize_app(firebase_config)
-auth = firebase.auth()
+# Pyrebase setup costs ~50-100ms (SDK init + HTTP session); cache it so
+# query-param reruns reuse the same client instead of rebuilding it
+@st.cache_resource
+def get_auth():
+    return pyrebase.initialize_app(firebase_config).auth()
+
+auth = get_auth()
 
 
 # ✅ Page Setup
@@ -83,202 +88,11 @@ if "action" in st.query_params:
             st.rerun()
 
 
-# Load your CSS
-css_content = """
-/* Your complete CSS here */
-* {
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}
-.head_container a {
-    text-decoration: none;
-    color: inherit;
-}
-.head_container{
-      font-family: 'Cinzel', serif;
-      font-size: 32px;
-      font-weight: 600;
-      position: fixed;
-      top: 0;
-      left: 0;
-      width: 100%;
-      backdrop-filter: blur(10px);
-      z-index: 1000;
-      padding: 20px 0px 0px 100px;
-      transition: all 0.3s ease-in-out;
-      background: transparent;
-}
-
-
-body {
-    font-family: -apple-system, BlinkMacSystemFont, 'Poppins', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-    background: #FCF5ED;
-    min-height: 100vh;
-    display: flex;
-    flex-direction: column;
-    align-items: center;
-    justify-content: center;
-    padding: 20px;
-}
-
-
-.container {
-    width: 100%;
-    max-width: 400px;
-    margin-bottom: 50px;
-    text-align: center;
-    animation: fadeIn 0.6s ease-out;
-}
-
-
-.logo {
-    font-size: 32px;
-    font-weight: 600;
-    letter-spacing: 2px;
-    color: #1a1a2e;
-    margin-bottom: 60px;
-    text-transform: uppercase;
-}
-
-
-h1 {
-    font-size: 32px;
-    font-weight: 600;
-    color: #1a1a2e;
-    margin-bottom: 50px;
-    line-height: 1.2;
-}
-
-
-.subtitle {
-    font-size: 16px;
-    color: #4a4a5e;
-    margin-bottom: 40px;
-}
-
-
-.form-container {
-    width: 100%;
-}
-
-
-.input-group {
-    margin-bottom: 20px;
-}
-
-
-input {
-    width: 100%;
-    padding: 16px 20px;
-    border: 2px solid #e8e8f0;
-    border-radius: 50px;
-    font-size: 16px;
-    background-color: rgba(255, 255, 255, 0.7);
-    transition: all 0.3s ease;
-    outline: none;
-}
-
-
-.no-acc {
-    padding: 16px;
-    font-size: 14px;
-}
-
-
-.no-acc a {
-    color: #1a2332;
-    text-decoration: underline;
-}
-
-
-input::placeholder {
-    color: #9a9aaa;
-}
-
-
-input:focus {
-    border-color: #d8b8b8;
-    background-color: rgba(255, 255, 255, 0.9);
-}
-
-
-input[type="email"] {
-    background-color: rgba(255, 255, 255, 0.9);
-    color: #4a4a5e;
-}
-
-
-.continue-btn {
-    width: 100%;
-    padding: 16px 20px;
-    background-color: #1a2332;
-    color: white;
-    border: none;
-    border-radius: 50px;
-    font-size: 16px;
-    font-weight: 500;
-    cursor: pointer;
-    transition: all 0.3s ease;
-    margin-top: 10px;
-}
-
-
-.continue-btn:hover {
-    background-color: #0f1720;
-    transform: translateY(-2px);
-    box-shadow: 0 5px 20px rgba(26, 35, 50, 0.3);
-}
-
-
-.continue-btn:active {
-    transform: translateY(0);
-}
-
-
-.footer-links {
-    position: fixed;
-    bottom: 30px;
-    left: 50%;
-    transform: translateX(-50%);
-    display: flex;
-    gap: 20px;
-    font-size: 14px;
-}
-
-
-.footer-links a {
-    color: #9a9aaa;
-    text-decoration: none;
-    transition: color 0.3s ease;
-}
-
-
-.footer-links a:hover {
-    color: #4a4a5e;
-}
-
-
-.footer-links span {
-    color: #d8d8e0;
-}
-
-
-@keyframes fadeIn {
-    from {
-        opacity: 0;
-        transform: translateY(20px);
-    }
-    to {
-        opacity: 1;
-        transform: translateY(0);
-    }
-}
-"""
-
-
-# HTML with integrated Firebase form handling
-html_content = f"""
+# HTML with integrated Firebase form handling — built once and cached so
+# each rerun reuses the assembled page instead of re-formatting it
+@st.cache_data
+def build_login_html() -> str:
+    return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -287,9 +101,7 @@ html_content = f"""
     <link href="https://fonts.googleapis.com/css2?family=Poppins:wght@400;500;600;700&display=swap" rel="stylesheet">
     <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&display=swap" rel="stylesheet">
     <title>Lexora - Login</title>
-    <style>
-        {css_content}
-    </style>
+    <link rel="stylesheet" href="/app/static/login.css">
 </head>
 <body>
     <header>
@@ -351,7 +163,7 @@ html_content = f"""
 
 
 # Render your HTML
-components.html(html_content, height=800, scrolling=False)
+components.html(build_login_html(), height=800, scrolling=False)
 
 
 
@@ -6,12 +6,13 @@ With Firestore persistent tracking (users can't bypass by refreshing)
 
 import streamlit as st
 import random
-import sys
+import html
+import io
+import json
 import os
 import re
-import hashlib
-import json
-from datetime import datetime
+import threading
+import time
 
 # -------------------------------------------------
 # Page config - MUST be first Streamlit command
@@ -27,7 +28,12 @@ st.set_page_config(
 # Import RAG System
 # -------------------------------------------------
 try:
-    from chat import answer_question
+    from chat import (
+        stream_answer,
+        NO_RESULTS_MESSAGE,
+        NO_CONTEXT_MESSAGE,
+        _lazy_init as _rag_warmup,
+    )
     RAG_AVAILABLE = True
     print("✅ RAG system loaded successfully")
 except ImportError as e:
@@ -38,366 +44,78 @@ except ImportError as e:
 # -------------------------------------------------
 # Firebase/Firestore Setup for Persistent Tracking
 # -------------------------------------------------
-FIRESTORE_AVAILABLE = False
-db = None
-
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
+# Deferred: importing firebase_admin and opening the gRPC channel costs
+# 600ms-2s, and logged-in users never touch the trial counter. The client
+# is built on the first trial read/write and cached for the process.
+@st.cache_resource
+def _get_db():
+    """Initialize Firebase Admin on first use; returns None if unavailable."""
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+    except ImportError as e:
+        print(f"⚠️ Firebase Admin SDK not installed: {e}")
+        return None
 
-    if not firebase_admin._apps:
-        try:
-            # Try Streamlit secrets first (for cloud deployment)
-            import streamlit as st
-            cred = credentials.Certificate(dict(st.secrets["FIREBASE_SERVICE_ACCOUNT"]))
-            firebase_admin.initialize_app(cred)
-            print("✅ Firebase initialized from Streamlit secrets")
-        except:
-            # Fallback to local file
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            src_dir = os.path.dirname(current_dir)
-            possible_paths = [
-                os.path.join(src_dir, "serviceAccountKey.json"),
-                os.path.join(current_dir, "serviceAccountKey.json"),
-                "serviceAccountKey.json",
-            ]
-            
-            service_account_path = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    service_account_path = path
-                    break
-            
-            if service_account_path:
-                cred = credentials.Certificate(service_account_path)
+    try:
+        if not firebase_admin._apps:
+            try:
+                # Try Streamlit secrets first (for cloud deployment)
+                cred = credentials.Certificate(dict(st.secrets["FIREBASE_SERVICE_ACCOUNT"]))
                 firebase_admin.initialize_app(cred)
-                print(f"✅ Firebase initialized from: {service_account_path}")
-            else:
-                print("⚠️ serviceAccountKey.json not found")
+                print("✅ Firebase initialized from Streamlit secrets")
+            except:
+                # Fallback to local file
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                src_dir = os.path.dirname(current_dir)
+                possible_paths = [
+                    os.path.join(src_dir, "serviceAccountKey.json"),
+                    os.path.join(current_dir, "serviceAccountKey.json"),
+                    "serviceAccountKey.json",
+                ]
+
+                service_account_path = None
+                for path in possible_paths:
+                    if os.path.exists(path):
+                        service_account_path = path
+                        break
+
+                if service_account_path:
+                    cred = credentials.Certificate(service_account_path)
+                    firebase_admin.initialize_app(cred)
+                    print(f"✅ Firebase initialized from: {service_account_path}")
+                else:
+                    print("⚠️ serviceAccountKey.json not found")
+
+        if firebase_admin._apps:
+            print("✅ Firestore connected successfully")
+            client = firestore.client()
+            # Idle gRPC channels go cold and the next get() stalls for
+            # seconds; a 60s ping keeps the channel hot for the process
+            # lifetime (started here so it runs once per cached client)
+            threading.Thread(target=_keepalive, args=(client,), daemon=True).start()
+            return client
+    except Exception as e:
+        print(f"⚠️ Firestore initialization error: {e}")
 
-    if firebase_admin._apps:
-        db = firestore.client()
-        FIRESTORE_AVAILABLE = True
-        print("✅ Firestore connected successfully")
+    return None
 
-except ImportError as e:
-    print(f"⚠️ Firebase Admin SDK not installed: {e}")
-except Exception as e:
-    print(f"⚠️ Firestore initialization error: {e}")
+def _keepalive(client):
+    while True:
+        time.sleep(60)
+        try:
+            client.collection('_keepalive').document('ping').get()
+        except Exception:
+            pass
 
 # -------------------------------------------------
 # FREE TRIAL CONFIGURATION
 # -------------------------------------------------
 FREE_TRIAL_LIMIT = 5  # Number of free questions for anonymous users
 
-# -------------------------------------------------
-# Session State Initialization
-# -------------------------------------------------
-if "logged_in" not in st.session_state:
-    st.session_state.logged_in = False
-if "user" not in st.session_state:
-    st.session_state.user = None
-if "history" not in st.session_state:
-    st.session_state.history = []
-if "dark_mode" not in st.session_state:
-    st.session_state.dark_mode = False
-if "pending_question" not in st.session_state:
-    st.session_state.pending_question = None
-if "question_count" not in st.session_state:
-    st.session_state.question_count = 0
-if "show_signup_modal" not in st.session_state:
-    st.session_state.show_signup_modal = False
-if "trial_exhausted" not in st.session_state:
-    st.session_state.trial_exhausted = False
-if "fingerprint" not in st.session_state:
-    st.session_state.fingerprint = None
-if "firestore_initialized" not in st.session_state:
-    st.session_state.firestore_initialized = False
-if "current_examples" not in st.session_state:
-    st.session_state.current_examples = [
-        "Explain the concept of secularism in Indian Constitution",
-        "What are the fundamental duties of citizens?",
-        "Explain Article 21 - Right to Life and Personal Liberty",
-        "What are the fundamental rights guaranteed by the Indian Constitution?"
-    ]
-# -------------------------------------------------
-# RESET TRIAL FLAGS FOR LOGGED-IN USERS
-# -------------------------------------------------
-if st.session_state.logged_in:
-    st.session_state.trial_exhausted = False
-    st.session_state.question_count = 0 
-
-
-# -------------------------------------------------
-# DEBUG: Check login status (REMOVE AFTER TESTING)
-# -------------------------------------------------
-#st.warning(f"DEBUG: logged_in={st.session_state.logged_in}, user={st.session_state.user}, trial_exhausted={st.session_state.trial_exhausted}")
-# -------------------------------------------------
-# CSS Styling (with FIXED modal styles)
-# -------------------------------------------------
-st.markdown("""
-<style>
-    /* Import Poppins Font */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
-    
-    /* Hide Streamlit Elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    .stDeployButton {display: none;}
-    div[data-testid="stToolbar"] {display: none;}
-    section[data-testid="stSidebar"] {display: none !important;}
-    [data-testid="collapsedControl"] {display: none !important;}
-    
-    /* Apply Poppins globally */
-    html, body, [class*="css"] {
-        font-family: 'Poppins', sans-serif !important;
-    }
-    
-    /* Main App Background */
-    .stApp {
-        background: #FCF5ED;
-    }
-    
-    /* Make the app fill viewport height without scroll */
-    .main .block-container {
-        padding: 0 !important;
-        max-width: 100% !important;
-        min-height: 100vh;
-        display: flex;
-        flex-direction: column;
-    }
-    
-    /* Welcome Header */
-    .welcome-header {
-        font-family: 'Poppins', sans-serif;
-        font-size: 2.2rem;
-        font-weight: 600;
-        color: #1A2B3C;
-        text-align: center;
-        margin-bottom: 8px;
-        line-height: 1.3;
-    }
-    
-    .welcome-subtitle {
-        font-family: 'Poppins', sans-serif;
-        font-size: 1rem;
-        font-weight: 400;
-        color: #4A5B6C;
-        text-align: center;
-        margin-bottom: 24px;
-    }
-    
-    /* Free Trial Badge */
-    .trial-badge {
-        text-align: center;
-        padding: 8px 16px;
-        border-radius: 20px;
-        font-size: 13px;
-        margin-bottom: 20px;
-        display: inline-block;
-        font-weight: 500;
-    }
-    
-    .trial-active {
-        background: linear-gradient(135deg, #E0F2FE, #BAE6FD);
-        color: #0369A1;
-        border: 1px solid #7DD3FC;
-    }
-    
-    .trial-warning {
-        background: linear-gradient(135deg, #FEF3C7, #FDE68A);
-        color: #92400E;
-        border: 1px solid #FCD34D;
-    }
-    
-    .trial-exhausted {
-        background: linear-gradient(135deg, #FEE2E2, #FECACA);
-        color: #DC2626;
-        border: 1px solid #F87171;
-    }
-    
-    .logged-in-badge {
-        background: linear-gradient(135deg, #D1FAE5, #A7F3D0);
-        color: #065F46;
-        border: 1px solid #6EE7B7;
-    }
-    
-    /* Chat Messages */
-    .chat-message {
-        display: flex;
-        gap: 14px;
-        margin-bottom: 24px;
-        max-width: 100%;
-    }
-    
-    .message-avatar {
-        width: 36px;
-        height: 36px;
-        border-radius: 50%;
-        flex-shrink: 0;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-size: 16px;
-    }
-    
-    .message-avatar.user {
-        background: linear-gradient(135deg, #FFB347, #FFCC80);
-    }
-    
-    .message-avatar.assistant {
-        background: linear-gradient(135deg, #3B82C4, #6BA5D7);
-    }
-    
-    .message-content {
-        flex: 1;
-        padding-top: 6px;
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    .message-content.user {
-        font-weight: 500;
-        font-size: 16px;
-        color: #1A2B3C;
-    }
-    
-    .message-content.assistant {
-        font-size: 15px;
-        line-height: 1.7;
-        color: #4A5B6C;
-        font-weight: 400;
-    }
-    
-    .message-content.assistant p {
-        margin-bottom: 12px;
-    }
-    
-    .message-content.assistant ol,
-    .message-content.assistant ul {
-        margin: 12px 0;
-        padding-left: 24px;
-    }
-    
-    .message-content.assistant li {
-        margin-bottom: 8px;
-        line-height: 1.6;
-    }
-    
-    .message-content.assistant strong {
-        color: #1A2B3C;
-        font-weight: 600;
-    }
-    
-    /* Chat Input Container */
-    .stChatInput {
-        position: fixed !important;
-        bottom: 0 !important;
-        left: 0 !important;
-        right: 0 !important;
-        padding: 20px 40px 30px !important;
-        background: #FCF5ED;
-        z-index: 1000 !important;
-    }
-    
-    .stChatInput > div {
-        max-width: 800px !important;
-        margin: 0 auto !important;
-        background: #F0F2F6 !important;
-        border: 2px solid #E8DDD4 !important;
-        border-radius: 16px !important;
-        box-shadow: 0 4px 24px rgba(139, 109, 76, 0.12) !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stChatInput > div:focus-within {
-        border-color: #C4A484 !important;
-        box-shadow: 0 6px 30px rgba(139, 109, 76, 0.2) !important;
-        background: #F0F2F6 !important;
-    }
-    
-    .stChatInput textarea {
-        font-family: 'Poppins', sans-serif !important;
-        font-size: 15px !important;
-        font-weight: 400 !important;
-        color: #475569 !important;
-        background: transparent !important;
-    }
-    
-    .stChatInput textarea::placeholder {
-        font-family: 'Poppins', sans-serif !important;
-        color: #8B7355 !important;
-        opacity: 0.7 !important;
-    }
-    
-    .stChatInput button {
-        background: linear-gradient(135deg, #C4A484, #A67C52) !important;
-        border: none !important;
-        border-radius: 12px !important;
-        color: #FFFFFF !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stChatInput button:hover {
-        background: linear-gradient(135deg, #A67C52, #8B6914) !important;
-        transform: scale(1.05) !important;
-        box-shadow: 0 4px 12px rgba(166, 124, 82, 0.4) !important;
-    }
-    
-    .stChatInput button svg {
-        color: #FFFFFF !important;
-        fill: #FFFFFF !important;
-    }
-    
-    /* Streamlit Button Overrides */
-    .stButton > button {
-        background: #FFFBF7 !important;
-        border: 1px solid #E8DDD4 !important;
-        border-radius: 12px !important;
-        color: #1A2B3C !important;
-        font-family: 'Poppins', sans-serif !important;
-        font-weight: 400 !important;
-        padding: 12px 16px !important;
-        font-size: 14px !important;
-        line-height: 1.4 !important;
-        height: auto !important;
-        min-height: 50px !important;
-        text-align: left !important;
-        white-space: normal !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .stButton > button:hover {
-        background: #FFF8F0 !important;
-        border-color: #C4A484 !important;
-        transform: translateY(-2px) !important;
-        box-shadow: 0 4px 12px rgba(196, 164, 132, 0.25) !important;
-    }
-    
-    /* Small action buttons */
-    .small-btn .stButton > button {
-        min-height: 36px !important;
-        padding: 6px 14px !important;
-        border-radius: 50px !important;
-        font-size: 13px !important;
-        font-weight: 500 !important;
-    }
-    
-    /* Content area with proper spacing for chat input */
-    .content-area {
-        padding-bottom: 100px;
-    }
-    
-    /* Hide empty space at top */
-    .block-container {
-        padding-top: 0 !important;
-    }
-    
-    .stVerticalBlock {
-        gap: 0.5rem !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Chat turns rendered inline; older ones collapse into an expander so
+# rerun cost stays bounded as the conversation grows
+VISIBLE_MESSAGES = 30
 
 # -------------------------------------------------
 # Example Questions Pool
@@ -429,6 +147,97 @@ EXAMPLE_QUESTIONS_POOL = [
     ]
 ]
 
+# -------------------------------------------------
+# Chat History Checkpointing (logged-in users only)
+# -------------------------------------------------
+# History lives in st.session_state and dies with the process; a small
+# per-user JSON checkpoint lets a logged-in user's conversation survive
+# a reconnect or app restart. Anonymous sessions stay in-memory only.
+_SESSIONS_DIR = os.path.join(os.path.expanduser("~"), ".lexora", "sessions")
+
+def _session_file(user):
+    """Map the logged-in user record to its checkpoint path, or None."""
+    if not user:
+        return None
+    uid = user.get("localId") or user.get("email") if isinstance(user, dict) else user
+    if not uid:
+        return None
+    safe = re.sub(r'[^A-Za-z0-9_.@-]', '_', str(uid))
+    return os.path.join(_SESSIONS_DIR, f"{safe}.json")
+
+def _load_session(user):
+    """Load the saved history for a user; None if absent or unreadable."""
+    path = _session_file(user)
+    if not path:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_session(user, history):
+    """Checkpoint history atomically (write temp file, then os.replace)."""
+    path = _session_file(user)
+    if not path:
+        return
+    try:
+        os.makedirs(_SESSIONS_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ Could not save session: {e}")
+
+# -------------------------------------------------
+# Session State Initialization
+# -------------------------------------------------
+# Immutable defaults applied in one pass; this block runs on every rerun
+_SESSION_DEFAULTS = {
+    "logged_in": False,
+    "user": None,
+    "dark_mode": False,
+    "pending_question": None,
+    "question_count": 0,
+    "show_signup_modal": False,
+    "trial_exhausted": False,
+    "fingerprint": None,
+    "firestore_initialized": False,
+}
+for _key, _value in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(_key, _value)
+
+# Mutable defaults stay out of the shared dict — every session needs its
+# own list, not a reference into module state
+if "history" not in st.session_state:
+    # Logged-in users pick their last conversation back up from the
+    # JSON checkpoint; anonymous sessions start fresh
+    saved = _load_session(st.session_state.get("user")) if st.session_state.get("logged_in") else None
+    st.session_state.history = saved or []
+if "current_examples" not in st.session_state:
+    # Pick a random example set once per session; the init guard keeps it
+    # stable across reruns until the user hits Refresh
+    st.session_state.current_examples = random.choice(EXAMPLE_QUESTIONS_POOL)
+# -------------------------------------------------
+# RESET TRIAL FLAGS FOR LOGGED-IN USERS
+# -------------------------------------------------
+if st.session_state.logged_in:
+    st.session_state.trial_exhausted = False
+    st.session_state.question_count = 0 
+
+
+# -------------------------------------------------
+# DEBUG: Check login status (REMOVE AFTER TESTING)
+# -------------------------------------------------
+#st.warning(f"DEBUG: logged_in={st.session_state.logged_in}, user={st.session_state.user}, trial_exhausted={st.session_state.trial_exhausted}")
+# -------------------------------------------------
+# CSS Styling (with FIXED modal styles)
+# -------------------------------------------------
+# Served as a static asset so the browser caches the ~200-line sheet
+# instead of Streamlit re-sending and re-parsing it on every rerun
+st.markdown('<link rel="stylesheet" href="/app/static/chat.css">', unsafe_allow_html=True)
+
 # -------------------------------------------------
 # FIRESTORE TRACKING FUNCTIONS
 # -------------------------------------------------
@@ -445,14 +254,26 @@ def get_or_create_fingerprint():
     st.session_state.fingerprint = fingerprint
     return fingerprint
 
+def _get_trial_doc_ref(db, fingerprint: str):
+    """Return the trial-user DocumentReference, cached per session.
+
+    Building the reference re-parses the document path each time; reruns
+    reuse the one stored in session state as long as the fingerprint
+    matches.
+    """
+    if st.session_state.get("_trial_doc_fingerprint") != fingerprint:
+        st.session_state._trial_doc_ref = db.collection('trial_users').document(fingerprint)
+        st.session_state._trial_doc_fingerprint = fingerprint
+    return st.session_state._trial_doc_ref
+
 def get_question_count_from_firestore(fingerprint: str) -> int:
     """Get question count from Firestore for a fingerprint."""
-    if not FIRESTORE_AVAILABLE or db is None:
+    db = _get_db()
+    if db is None:
         return st.session_state.question_count
-    
+
     try:
-        doc_ref = db.collection('trial_users').document(fingerprint)
-        doc = doc_ref.get()
+        doc = _get_trial_doc_ref(db, fingerprint).get()
         if doc.exists:
             return doc.to_dict().get('question_count', 0)
         return 0
@@ -460,13 +281,10 @@ def get_question_count_from_firestore(fingerprint: str) -> int:
         print(f"Firestore read error: {e}")
         return st.session_state.question_count
 
-def save_question_count_to_firestore(fingerprint: str, count: int):
-    """Save question count to Firestore."""
-    if not FIRESTORE_AVAILABLE or db is None:
-        return
-    
+def _flush_count(doc_ref, count: int):
+    """Blocking Firestore write, run on a worker thread."""
     try:
-        doc_ref = db.collection('trial_users').document(fingerprint)
+        from firebase_admin import firestore
         doc_ref.set({
             'question_count': count,
             'updated_at': firestore.SERVER_TIMESTAMP,
@@ -475,15 +293,33 @@ def save_question_count_to_firestore(fingerprint: str, count: int):
     except Exception as e:
         print(f"Firestore write error: {e}")
 
+def save_question_count_to_firestore(fingerprint: str, count: int):
+    """Save question count to Firestore without blocking the rerun.
+
+    The client and document reference are resolved here on the script
+    thread (both touch Streamlit caches / session state); only the
+    network round-trip is handed to a daemon thread, so the user's next
+    rerun never waits on Firestore.
+    """
+    db = _get_db()
+    if db is None:
+        return
+
+    doc_ref = _get_trial_doc_ref(db, fingerprint)
+    threading.Thread(target=_flush_count, args=(doc_ref, count), daemon=True).start()
+
 def init_trial_count():
     """Initialize trial count from Firestore on first load."""
     if st.session_state.firestore_initialized:
         return
-    
-    if not st.session_state.logged_in and FIRESTORE_AVAILABLE:
+
+    # Logged-in users never consume the trial, so they skip Firestore
+    # (and its import/init cost) entirely
+    if not st.session_state.logged_in:
         fingerprint = get_or_create_fingerprint()
         count = get_question_count_from_firestore(fingerprint)
         st.session_state.question_count = count
+        st.session_state._last_persisted_count = count
         if count >= FREE_TRIAL_LIMIT:
             st.session_state.trial_exhausted = True
     
@@ -511,20 +347,28 @@ def increment_question_count():
     """Increment the question count for anonymous users and save to Firestore."""
     if not st.session_state.logged_in:
         st.session_state.question_count += 1
-        # Save to Firestore for persistence
-        fingerprint = get_or_create_fingerprint()
-        save_question_count_to_firestore(fingerprint, st.session_state.question_count)
+        count = st.session_state.question_count
+        # Debounced persistence: the session count is authoritative, so
+        # only every second question — or the one that exhausts the trial,
+        # which must survive a refresh — pays the Firestore round-trip
+        last_persisted = st.session_state.get("_last_persisted_count", 0)
+        if count - last_persisted >= 2 or count >= FREE_TRIAL_LIMIT:
+            fingerprint = get_or_create_fingerprint()
+            save_question_count_to_firestore(fingerprint, count)
+            st.session_state._last_persisted_count = count
         # Check if trial is exhausted after this question
-        if st.session_state.question_count >= FREE_TRIAL_LIMIT:
+        if count >= FREE_TRIAL_LIMIT:
             st.session_state.trial_exhausted = True
 
-def get_trial_status_badge() -> str:
-    """Generate HTML for trial status badge."""
-    if st.session_state.logged_in:
+# st.cache_data, not lru_cache: this page script re-executes in a fresh
+# namespace every rerun, so an lru_cache here would restart empty each
+# time — only Streamlit's store persists across reruns
+@st.cache_data(show_spinner=False)
+def _badge_html(logged_in: bool, remaining: int) -> str:
+    """Build the badge markup for one (logged_in, remaining) state."""
+    if logged_in:
         return '<span class="trial-badge logged-in-badge">✓ Unlimited Access</span>'
-    
-    remaining = get_remaining_questions()
-    
+
     if remaining == 0:
         return '<span class="trial-badge trial-exhausted">⚠️ Free trial ended</span>'
     elif remaining <= 2:
@@ -532,88 +376,137 @@ def get_trial_status_badge() -> str:
     else:
         return f'<span class="trial-badge trial-active">✨ {remaining} free questions remaining</span>'
 
+def get_trial_status_badge() -> str:
+    """Generate HTML for trial status badge (cached per distinct state)."""
+    return _badge_html(st.session_state.logged_in, get_remaining_questions())
+
+# -------------------------------------------------
+# Chat Message Rendering
+# -------------------------------------------------
+# One template for both roles, built at import
+_MSG_TMPL = (
+    '<div class="chat-message">'
+    '<div class="message-avatar {cls}">{avatar}</div>'
+    '<div class="message-content {cls}">{content}</div>'
+    '</div>'
+)
+
+# Message content is immutable once appended to history, so each bubble's
+# HTML is built once per (role, content) and every later rerun is a cache
+# hit instead of a string rebuild per message
+@st.cache_data(show_spinner=False)
+def _render_message_html(role: str, content: str) -> str:
+    """Build the chat-bubble HTML for one history entry."""
+    if role == "user":
+        # User text is raw input: escape it so markup in a question
+        # shows as text. Assistant content is HTML we generated.
+        return _MSG_TMPL.format(cls="user", avatar="👤", content=html.escape(content))
+    return _MSG_TMPL.format(cls="assistant", avatar="⚖️", content=content)
+
 # -------------------------------------------------
 # IMPROVED: Markdown to HTML Converter
 # -------------------------------------------------
+# Compiled once: markdown_to_html runs these against every line of every
+# answer, so skip the per-call pattern-cache lookup
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+_ITALIC_RE = re.compile(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)')
+_NUM_RE = re.compile(r'^(\d+)[.\)]\s*(.+)$')
+_BUL_RE = re.compile(r'^[-•*]\s+(.+)$')
+
 def markdown_to_html(text: str) -> str:
     """
     Convert markdown formatting to HTML.
     Handles: **bold**, *italic*, numbered lists, bullet lists, paragraphs
+
+    Not memoized: each answer is converted once on arrival and stored as
+    HTML (in history and the response cache), so a cache here would never
+    see the same text twice — and an lru_cache would not survive the
+    page-script rerun anyway.
     """
     if not text:
         return "<p>I couldn't generate a response.</p>"
     
     # Step 1: Convert **bold** to <strong>
-    text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text)
-    
+    text = _BOLD_RE.sub(r'<strong>\1</strong>', text)
+
     # Step 2: Convert *italic* to <em> (but not if it's part of a list marker)
-    text = re.sub(r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)', r'<em>\1</em>', text)
+    text = _ITALIC_RE.sub(r'<em>\1</em>', text)
     
-    # Step 3: Process the text line by line for lists and paragraphs
-    lines = text.split('\n')
-    html_parts = []
+    # Step 3: Process the text line by line for lists and paragraphs.
+    # Everything is written straight into one buffer — no per-paragraph
+    # lists or join() allocations, paragraphs are bracketed in place.
+    buf = io.StringIO()
+    write = buf.write
     current_list = None  # 'ol' or 'ul' or None
-    current_paragraph = []
-    
-    for line in lines:
+    in_paragraph = False
+
+    for line in text.split('\n'):
         stripped = line.strip()
-        
+
+        # Cheap first-character gate: plain prose lines (the vast
+        # majority) skip both regexes entirely
+        first = stripped[:1]
         # Check if it's a numbered list item (1. or 1) or 2. etc)
-        numbered_match = re.match(r'^(\d+)[.\)]\s*(.+)$', stripped)
+        numbered_match = _NUM_RE.match(stripped) if first.isdigit() else None
         # Check if it's a bullet list item
-        bullet_match = re.match(r'^[-•*]\s+(.+)$', stripped)
-        
+        bullet_match = _BUL_RE.match(stripped) if (first and first in '-•*') else None
+
         if numbered_match:
             # Close any open paragraph
-            if current_paragraph:
-                html_parts.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            
+            if in_paragraph:
+                write('</p>\n')
+                in_paragraph = False
+
             # Start ordered list if not already in one
             if current_list != 'ol':
                 if current_list == 'ul':
-                    html_parts.append('</ul>')
-                html_parts.append('<ol>')
+                    write('</ul>\n')
+                write('<ol>\n')
                 current_list = 'ol'
-            
-            html_parts.append(f'<li>{numbered_match.group(2)}</li>')
-            
+
+            write(f'<li>{numbered_match.group(2)}</li>\n')
+
         elif bullet_match:
             # Close any open paragraph
-            if current_paragraph:
-                html_parts.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-            
+            if in_paragraph:
+                write('</p>\n')
+                in_paragraph = False
+
             # Start unordered list if not already in one
             if current_list != 'ul':
                 if current_list == 'ol':
-                    html_parts.append('</ol>')
-                html_parts.append('<ul>')
+                    write('</ol>\n')
+                write('<ul>\n')
                 current_list = 'ul'
-            
-            html_parts.append(f'<li>{bullet_match.group(1)}</li>')
-            
+
+            write(f'<li>{bullet_match.group(1)}</li>\n')
+
         elif stripped == '':
             # Empty line - close paragraph but keep list open
-            if current_paragraph:
-                html_parts.append('<p>' + ' '.join(current_paragraph) + '</p>')
-                current_paragraph = []
-                
+            if in_paragraph:
+                write('</p>\n')
+                in_paragraph = False
+
         else:
             # Regular text - close any open list first
             if current_list:
-                html_parts.append(f'</{current_list}>')
+                write(f'</{current_list}>\n')
                 current_list = None
-            
-            current_paragraph.append(stripped)
-    
+
+            if in_paragraph:
+                write(' ')
+            else:
+                write('<p>')
+                in_paragraph = True
+            write(stripped)
+
     # Close any remaining open elements
     if current_list:
-        html_parts.append(f'</{current_list}>')
-    if current_paragraph:
-        html_parts.append('<p>' + ' '.join(current_paragraph) + '</p>')
-    
-    result = '\n'.join(html_parts)
+        write(f'</{current_list}>')
+    if in_paragraph:
+        write('</p>')
+
+    result = buf.getvalue()
     
     # If no HTML was generated, wrap in paragraph
     if not result.strip():
@@ -623,33 +516,30 @@ def markdown_to_html(text: str) -> str:
 
 
 # -------------------------------------------------
-# Response Generator - CONNECTED TO RAG
+# Response Cache
 # -------------------------------------------------
-def generate_response(question: str) -> tuple:
-    """
-    Generate response using the actual RAG system.
-    Falls back to demo responses if RAG is unavailable.
-    """
-    
-    if RAG_AVAILABLE:
-        try:
-            # Call the actual RAG pipeline
-            answer = answer_question(question, verbose=False)
-            
-            # Convert markdown to HTML for proper display
-            formatted_answer = markdown_to_html(answer)
-            
-            sources = []
-            return formatted_answer, sources
-            
-        except Exception as e:
-            error_msg = f"<p>Sorry, I encountered an error while processing your question: {str(e)}</p>"
-            return error_msg, []
-    
-    else:
-        return generate_demo_response(question)
+# One dict shared across all sessions for the process lifetime: the RAG
+# pipeline answers each question independently of chat history, so the
+# finished HTML is keyed on the question text alone. The four example
+# buttons feed from a fixed pool, so popular questions hit this cache
+# across users and skip retrieval + generation entirely.
+_RESPONSE_CACHE_MAX = 512
 
+@st.cache_resource
+def _response_cache() -> dict:
+    return {}
 
+def _cache_response(question: str, response: str):
+    cache = _response_cache()
+    if len(cache) >= _RESPONSE_CACHE_MAX:
+        # Drop the oldest entry; dicts preserve insertion order
+        cache.pop(next(iter(cache)))
+    cache[question] = response
+
+# -------------------------------------------------
+# Response Generator - demo fallback (the RAG path streams via
+# stream_answer + st.write_stream in the input handler below)
+# -------------------------------------------------
 def generate_demo_response(question: str) -> tuple:
     """
     Fallback demo responses when RAG is unavailable.
@@ -720,6 +610,13 @@ def generate_demo_response(question: str) -> tuple:
     return response, sources
 
 
+# -------------------------------------------------
+# Static page fragments — built once at import, reused every rerun
+# -------------------------------------------------
+_WELCOME_HTML = '<h1 class="welcome-header">Hey there! I\'m Lexora, your personal law assistant.</h1>'
+_BADGE_WRAP = '<div style="text-align: center;">{}</div>'
+_BADGE_WRAP_CHAT = '<div style="text-align: center; margin-bottom: 20px;">{}</div>'
+
 # -------------------------------------------------
 # SHOW SIGNUP MODAL USING STREAMLIT DIALOG
 # -------------------------------------------------
@@ -770,68 +667,65 @@ if st.session_state.trial_exhausted and not st.session_state.logged_in:
 
 # Show example questions only if no chat history
 if not st.session_state.history:
+    # Warm the RAG clients in the background while the user reads the
+    # welcome screen so their first question skips the cold init
+    # (_lazy_init is internally guarded, so a stray second call is a no-op)
+    if RAG_AVAILABLE and not st.session_state.get("_rag_warmed"):
+        threading.Thread(target=_rag_warmup, daemon=True).start()
+        st.session_state._rag_warmed = True
+
     st.markdown("<div style='height: 15vh;'></div>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns([1, 2.5, 1])
     
     with col2:
-        st.markdown('<h1 class="welcome-header">Hey there! I\'m Lexora, your personal law assistant.</h1>', unsafe_allow_html=True)
+        st.markdown(_WELCOME_HTML, unsafe_allow_html=True)
         st.markdown('<p class="welcome-subtitle">Ask me anything about Indian law, or try one of these examples:</p>', unsafe_allow_html=True)
-        
+
         # Trial Status Badge
-        st.markdown(f'<div style="text-align: center;">{get_trial_status_badge()}</div>', unsafe_allow_html=True)
+        st.markdown(_BADGE_WRAP.format(get_trial_status_badge()), unsafe_allow_html=True)
         
-        # Example Questions as 2x2 Grid
+        # Example Questions as 2x2 Grid — one loop over the four slots;
+        # the trial check runs once per rerun instead of once per button
         examples = st.session_state.current_examples
-        
+        allowed = can_ask_question()
+
         row1_col1, row1_col2 = st.columns(2)
-        with row1_col1:
-            if st.button(f"📜 {examples[0]}", key="ex_0", use_container_width=True):
-                if can_ask_question():
-                    st.session_state.pending_question = examples[0]
-                    st.rerun()
-                else:
-                    st.session_state.trial_exhausted = True
-                    st.rerun()
-        with row1_col2:
-            if st.button(f"⚖️ {examples[1]}", key="ex_1", use_container_width=True):
-                if can_ask_question():
-                    st.session_state.pending_question = examples[1]
-                    st.rerun()
-                else:
-                    st.session_state.trial_exhausted = True
-                    st.rerun()
-        
         row2_col1, row2_col2 = st.columns(2)
-        with row2_col1:
-            if st.button(f"🏛️ {examples[2]}", key="ex_2", use_container_width=True):
-                if can_ask_question():
-                    st.session_state.pending_question = examples[2]
-                    st.rerun()
-                else:
-                    st.session_state.trial_exhausted = True
-                    st.rerun()
-        with row2_col2:
-            if st.button(f"📖 {examples[3]}", key="ex_3", use_container_width=True):
-                if can_ask_question():
-                    st.session_state.pending_question = examples[3]
-                    st.rerun()
-                else:
-                    st.session_state.trial_exhausted = True
-                    st.rerun()
+        _EXAMPLE_ICONS = ("📜", "⚖️", "🏛️", "📖")
+        for i, (col, icon, text) in enumerate(
+            zip((row1_col1, row1_col2, row2_col1, row2_col2), _EXAMPLE_ICONS, examples)
+        ):
+            with col:
+                if st.button(f"{icon} {text}", key=f"ex_{i}", use_container_width=True):
+                    if allowed:
+                        # No st.rerun(): the pending question is consumed
+                        # by the input handler further down this same run
+                        st.session_state.pending_question = text
+                    else:
+                        # The exhausted-trial modal renders above this
+                        # point, so it needs a fresh run to appear
+                        st.session_state.trial_exhausted = True
+                        st.rerun()
         
         # Refresh Examples Button
         st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
         refresh_col1, refresh_col2, refresh_col3 = st.columns([1.5, 1, 1.5])
         with refresh_col2:
-            st.markdown('<div class="small-btn">', unsafe_allow_html=True)
             if st.button("🔄 Refresh", key="refresh", use_container_width=True):
-                current = st.session_state.current_examples
-                available = [ex for ex in EXAMPLE_QUESTIONS_POOL if ex != current]
-                if available:
-                    st.session_state.current_examples = random.choice(available)
+                # Sample an index other than the current set directly
+                # instead of building a filtered copy of the pool:
+                # draw from the first n-1 slots and map a collision
+                # with the current set onto the excluded last slot
+                pool = EXAMPLE_QUESTIONS_POOL
+                n = len(pool)
+                if n > 1:
+                    current = st.session_state.current_examples
+                    pick = pool[random.randrange(n - 1)]
+                    if pick is current:
+                        pick = pool[-1]
+                    st.session_state.current_examples = pick
                 st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
 
 else:
     # Display chat history
@@ -839,78 +733,94 @@ else:
     
     col1, col2, col3 = st.columns([1, 3, 1])
     with col2:
-        st.markdown('<h1 class="welcome-header">Hey there! I\'m Lexora, your personal law assistant.</h1>', unsafe_allow_html=True)
-        
+        st.markdown(_WELCOME_HTML, unsafe_allow_html=True)
+
         # Trial Status Badge in chat view
-        st.markdown(f'<div style="text-align: center; margin-bottom: 20px;">{get_trial_status_badge()}</div>', unsafe_allow_html=True)
+        st.markdown(_BADGE_WRAP_CHAT.format(get_trial_status_badge()), unsafe_allow_html=True)
         
-        for message in st.session_state.history:
-            role = message["role"]
-            content = message["content"]
-            
-            if role == "user":
-                st.markdown(f'''
-                    <div class="chat-message">
-                        <div class="message-avatar user">👤</div>
-                        <div class="message-content user">{content}</div>
-                    </div>
-                ''', unsafe_allow_html=True)
-            else:
-                st.markdown(f'''
-                    <div class="chat-message">
-                        <div class="message-avatar assistant">⚖️</div>
-                        <div class="message-content assistant">{content}</div>
-                    </div>
-                ''', unsafe_allow_html=True)
+        # One st.markdown for the whole transcript: Streamlit sends one
+        # ForwardMsg over the websocket instead of one per message, and
+        # the join concatenates cached bubble strings. Long chats only
+        # render the recent tail by default — earlier turns sit in a
+        # collapsed expander whose body costs nothing until opened.
+        history = st.session_state.history
+        if len(history) > VISIBLE_MESSAGES:
+            earlier = history[:-VISIBLE_MESSAGES]
+            with st.expander(f"Show {len(earlier)} earlier messages"):
+                st.markdown(
+                    "".join(
+                        _render_message_html(message["role"], message["content"])
+                        for message in earlier
+                    ),
+                    unsafe_allow_html=True,
+                )
+            tail = history[-VISIBLE_MESSAGES:]
+        else:
+            tail = history
+        st.markdown(
+            "".join(
+                _render_message_html(message["role"], message["content"])
+                for message in tail
+            ),
+            unsafe_allow_html=True,
+        )
         
-        # Action buttons after chat
+        # Action buttons after chat — a fragment, so clicks that don't
+        # touch the transcript (Export PDF's toast) rerun only this
+        # block. Clear/New Chat mutate history rendered above, so they
+        # call st.rerun() which escalates to a full-app run.
         st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
-        btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
-        
-        with btn_col1:
-            st.markdown('<div class="small-btn">', unsafe_allow_html=True)
-            if st.button("🗑️ Clear Chat", key="clear", use_container_width=True):
-                st.session_state.history = []
-                st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        with btn_col2:
-            st.markdown('<div class="small-btn">', unsafe_allow_html=True)
-            if st.button("📄 Export PDF", key="pdf", use_container_width=True):
-                st.toast("PDF export coming soon!", icon="📄")
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        with btn_col3:
-            st.markdown('<div class="small-btn">', unsafe_allow_html=True)
-            if st.button("🔄 New Chat", key="new", use_container_width=True):
-                st.session_state.history = []
-                st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        with btn_col4:
-            st.markdown('<div class="small-btn">', unsafe_allow_html=True)
-            if st.session_state.logged_in:
-                if st.button("🚪 Logout", key="logout", use_container_width=True):
-                    st.session_state.logged_in = False
-                    st.session_state.user = None
+
+        @st.fragment
+        def _action_buttons():
+            btn_col1, btn_col2, btn_col3, btn_col4 = st.columns(4)
+
+            with btn_col1:
+                if st.button("🗑️ Clear Chat", key="clear", use_container_width=True):
                     st.session_state.history = []
-                    st.switch_page("pages/login.py")
-            else:
-                if st.button("🔐 Sign Up", key="signup_btn", use_container_width=True):
-                    st.switch_page("pages/signup.py")
-            st.markdown('</div>', unsafe_allow_html=True)
+                    if st.session_state.logged_in:
+                        _save_session(st.session_state.user, [])
+                    st.rerun()
+
+            with btn_col2:
+                if st.button("📄 Export PDF", key="pdf", use_container_width=True):
+                    st.toast("PDF export coming soon!", icon="📄")
+
+            with btn_col3:
+                if st.button("🔄 New Chat", key="new", use_container_width=True):
+                    st.session_state.history = []
+                    if st.session_state.logged_in:
+                        _save_session(st.session_state.user, [])
+                    st.rerun()
+
+            with btn_col4:
+                if st.session_state.logged_in:
+                    if st.button("🚪 Logout", key="logout", use_container_width=True):
+                        st.session_state.logged_in = False
+                        st.session_state.user = None
+                        st.session_state.history = []
+                        st.switch_page("pages/login.py")
+                else:
+                    if st.button("🔐 Sign Up", key="signup_btn", use_container_width=True):
+                        st.switch_page("pages/signup.py")
+
+        _action_buttons()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # -------------------------------------------------
 # CHAT INPUT (at bottom)
 # -------------------------------------------------
+# Evaluated once per rerun; nothing between here and the handler can
+# change the trial state, so the gate and the handler share one check
+can_ask = can_ask_question()
+
 if st.session_state.pending_question:
     user_input = st.session_state.pending_question
     st.session_state.pending_question = None
 else:
     # Only show chat input if user can still ask questions
-    if can_ask_question():
+    if can_ask:
         user_input = st.chat_input("Enter your legal questions....")
     else:
         user_input = st.chat_input("Sign up to continue asking questions...", disabled=True)
@@ -919,18 +829,68 @@ else:
 # Handle input
 if user_input:
     # Double-check they can ask (in case of race condition)
-    if not can_ask_question():
+    if not can_ask:
         st.session_state.trial_exhausted = True
         st.rerun()
+    # Double-click guard: an identical submit within 2s of the last one
+    # (example buttons are the usual culprit) is dropped before it costs
+    # a duplicate turn and another trial question
+    elif (st.session_state.get("_last_submit") == user_input
+          and time.monotonic() - st.session_state.get("_last_submit_ts", 0.0) < 2.0):
+        st.rerun()
     else:
+        st.session_state._last_submit = user_input
+        st.session_state._last_submit_ts = time.monotonic()
         st.session_state.history.append({"role": "user", "content": user_input})
-        
-        with st.spinner("Researching legal documents..."):
-            response, sources = generate_response(user_input)
-        
-        st.session_state.history.append({"role": "assistant", "content": response, "sources": sources})
-        
-        # Increment question count AFTER successful response
-        increment_question_count()
-        
+
+        if RAG_AVAILABLE:
+            sources = []
+            cached = _response_cache().get(user_input)
+            if cached is not None:
+                # Repeat question (e.g. an example button another user
+                # already clicked): serve the finished answer straight
+                # from the cache, no retrieval or generation
+                response = cached
+            else:
+                # Stream the answer token-by-token: the first words
+                # appear as soon as the model starts generating instead
+                # of after the whole completion. The rerun below
+                # re-renders the finished turn from history in the
+                # styled bubbles.
+                col1, col2, col3 = st.columns([1, 3, 1])
+                with col2:
+                    st.markdown(_render_message_html("user", user_input), unsafe_allow_html=True)
+                    try:
+                        full_text = str(st.write_stream(stream_answer(user_input)))
+                        response = markdown_to_html(full_text)
+                        # Only clean completions go into the shared
+                        # cache: stream_answer re-raises on pipeline
+                        # failure (skipping this line), and the named
+                        # no-results/no-context fallbacks are what an
+                        # outage produces, so caching them would pin a
+                        # bad answer for every later user
+                        if full_text not in (NO_RESULTS_MESSAGE, NO_CONTEXT_MESSAGE):
+                            _cache_response(user_input, response)
+                    except Exception as e:
+                        response = f"<p>Sorry, I encountered an error while processing your question: {str(e)}</p>"
+        else:
+            with st.spinner("Researching legal documents..."):
+                response, sources = generate_demo_response(user_input)
+
+        # Sources live in a side table keyed by message index — the
+        # render loop and the JSON checkpoint only carry role/content,
+        # so the hot path never copies source metadata it doesn't show
+        msg_id = len(st.session_state.history)
+        st.session_state.history.append({"role": "assistant", "content": response, "id": msg_id})
+        if sources:
+            st.session_state.setdefault("sources_by_msg_id", {})[msg_id] = sources
+
+        # Increment question count AFTER successful response; logged-in
+        # users are unlimited, so skip the call outright
+        if not st.session_state.logged_in:
+            increment_question_count()
+        else:
+            # Checkpoint once per completed turn, not per token
+            _save_session(st.session_state.user, st.session_state.history)
+
         st.rerun()
\ No newline at end of file
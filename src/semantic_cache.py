@@ -0,0 +1,71 @@
+# Semantic cache for evaluation runs: near-duplicate questions (common in
+# auto-generated/paraphrased question banks) reuse the stored answer and
+# scores instead of re-running the whole RAG pipeline.
+
+import os
+import threading
+import numpy as np
+
+
+class SemanticCache:
+    """Cosine-threshold cache keyed on query embeddings.
+
+    Cached query vectors are kept L2-normalized in one float32 matrix so a
+    lookup is a single matrix-vector product; any similarity at or above
+    `threshold` counts as a hit and returns the stored payload.
+    """
+
+    def __init__(self, path: str = "semantic_cache.npz", threshold: float = 0.92):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._vectors = None  # (n, d) float32, rows unit-normalized
+        self._payloads = []
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path, allow_pickle=True)
+            self._vectors = data["vectors"]
+            self._payloads = list(data["payloads"])
+        except Exception:
+            self._vectors = None
+            self._payloads = []
+
+    @staticmethod
+    def _unit(qvec) -> np.ndarray:
+        q = np.asarray(qvec, dtype=np.float32)
+        return q / np.linalg.norm(q)
+
+    def lookup(self, qvec):
+        """Return the payload of the closest cached question, or None."""
+        q = self._unit(qvec)
+        with self._lock:
+            if self._vectors is None or not self._payloads:
+                return None
+            sims = self._vectors @ q
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                return self._payloads[best]
+        return None
+
+    def add(self, qvec, payload) -> None:
+        q = self._unit(qvec)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = q[None, :]
+            else:
+                self._vectors = np.vstack([self._vectors, q])
+            self._payloads.append(payload)
+
+    def save(self) -> None:
+        with self._lock:
+            if self._vectors is None:
+                return
+            np.savez(
+                self.path,
+                vectors=self._vectors,
+                payloads=np.array(self._payloads, dtype=object),
+            )